@@ -1,87 +1,658 @@
 import os
 import json
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+import time
 from dotenv import load_dotenv
-from mistralai import Mistral
 
-from .scraper import scrape_job_description
-from .prompts import resume_score_prompt, tailored_answer_prompt
-from .models import ResumeScore
+from .scraper import scrape_job_description, scrape_job_description_async, normalize_url
+from .prompts import (
+    resume_score_prompt, tailored_answer_prompt, batch_resume_score_prompt, batch_tailored_answer_prompt
+)
+from .models import BatchResumeScores, ResumeScore, TailoredAnswers
+from .cache import build_cache
+from .governor import governor_from_env, is_retryable
+from .compaction import PROMPT_TOKEN_BUDGET, fit_to_budget, truncate_to_tokens
+from .metrics import observe, registry, timed
 load_dotenv()
 
-client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+logger = logging.getLogger(__name__)
 
+_client = None
+_client_lock = threading.Lock()
 
-def call_mistral(prompt):
 
-    response = client.chat.complete(
-        model="mistral-large-latest",
+def get_client():
+    """
+    The shared Mistral client, built on first use: importing the SDK takes most of
+    a second, which would otherwise delay every cold start.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from mistralai import Mistral
+                # MISTRAL_SERVER_URL points the client at another endpoint (e.g. the benchmark's fake Mistral)
+                _client = Mistral(
+                    api_key=os.getenv("MISTRAL_API_KEY"),
+                    server_url=os.getenv("MISTRAL_SERVER_URL") or None
+                )
+    return _client
+
+
+async def get_client_async():
+    """get_client for coroutines: the first build runs on a thread, so the event loop never waits on _client_lock"""
+    if _client is not None:
+        return _client
+    return await asyncio.to_thread(get_client)
+
+
+def warm_up():
+    """Build the Mistral client and load the HTML parser, so the first request does not pay for them"""
+    get_client()
+    import bs4  # noqa: F401
+
+
+MODEL = "mistral-large-latest"
+TEMPERATURE = 0.2
+
+# Upper bound on the JD text packed into one batch analysis prompt
+BATCH_PROMPT_MAX_CHARS = int(os.getenv("BATCH_PROMPT_MAX_CHARS", 18000))
+# Application questions answered together in one call
+ANSWER_BATCH_MAX_QUESTIONS = int(os.getenv("ANSWER_BATCH_MAX_QUESTIONS", 10))
+
+# Completions are cached per prompt type; a TTL of 0 disables caching for that type
+LLM_CACHE_TTLS = {
+    "resume_score": float(os.getenv("LLM_CACHE_TTL_RESUME_SCORE", 7 * 24 * 60 * 60)),
+    "tailored_answer": float(os.getenv("LLM_CACHE_TTL_TAILORED_ANSWER", 24 * 60 * 60)),
+}
+
+llm_cache = build_cache(
+    "llm",
+    ttl=float(os.getenv("LLM_CACHE_TTL", 24 * 60 * 60)),
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", 1024)),
+    path=os.getenv("LLM_CACHE_PATH"),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+    disk_max_bytes=int(os.getenv("LLM_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)),
+)
+
+# Concurrency limit, coalescing, retries and circuit breaker for every Mistral call
+governor = governor_from_env()
+
+# Ask Mistral for output constrained to each response's JSON schema (0 sends free-form prompts only)
+MISTRAL_JSON_MODE = os.getenv("MISTRAL_JSON_MODE", "1") == "1"
+# Fresh calls made when a resume analysis still fails validation after repair
+RESUME_SCORE_RETRIES = int(os.getenv("RESUME_SCORE_RETRIES", 1))
+
+def _strict_schema(schema):
+    """JSON schema with additionalProperties disabled on every object, as strict mode expects"""
+    if isinstance(schema, dict):
+        schema = {key: _strict_schema(value) for key, value in schema.items()}
+        if schema.get("type") == "object":
+            schema["additionalProperties"] = False
+    elif isinstance(schema, list):
+        schema = [_strict_schema(value) for value in schema]
+    return schema
+
+
+def json_schema_format(name, model):
+    """response_format constraining Mistral's output to a pydantic model, or None without JSON mode"""
+    if not MISTRAL_JSON_MODE:
+        return None
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": _strict_schema(model.model_json_schema()), "strict": True},
+    }
+
+
+RESUME_SCORE_FORMAT = json_schema_format("resume_score", ResumeScore)
+BATCH_RESUME_SCORES_FORMAT = json_schema_format("batch_resume_scores", BatchResumeScores)
+TAILORED_ANSWERS_FORMAT = json_schema_format("tailored_answers", TailoredAnswers)
+
+LLM_PARSE_RESULTS = registry.counter(
+    "llm_parse_results_total", "Resume analysis responses by outcome (valid, repaired, failed)", ["outcome"]
+)
+LLM_WASTED_SECONDS = registry.counter(
+    "llm_wasted_seconds_total", "Mistral latency spent on resume analyses discarded as invalid"
+)
+
+
+def normalize_text(text):
+    """Collapse whitespace so cosmetically different inputs build the same prompt."""
+    return " ".join(text.split())
+
+
+def prompt_cache_key(prompt, response_format=None):
+    # A schema-constrained response is not interchangeable with a free-form one
+    if response_format is not None:
+        prompt = f"{json.dumps(response_format, sort_keys=True)}\x00{prompt}"
+    return hashlib.sha256(f"{MODEL}\x00{TEMPERATURE}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+def _cache_ttl(prompt_type):
+    return LLM_CACHE_TTLS.get(prompt_type, llm_cache.ttl)
+
+
+def call_mistral(prompt, prompt_type=None, response_format=None):
+
+    ttl = _cache_ttl(prompt_type)
+    key = prompt_cache_key(prompt, response_format)
+    if ttl > 0:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    with timed("llm_call"):
+        response = governor.call_sync(lambda: get_client().chat.complete(
+            model=MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=TEMPERATURE,
+            response_format=response_format
+        ))
+
+    content = response.choices[0].message.content
+    if ttl > 0:
+        llm_cache.set(key, content, ttl=ttl)
+    return content
+
+
+async def call_mistral_async(prompt, prompt_type=None, response_format=None):
+
+    ttl = _cache_ttl(prompt_type)
+    key = prompt_cache_key(prompt, response_format)
+    if ttl > 0:
+        cached = await llm_cache.get_async(key)
+        if cached is not None:
+            return cached
+
+    client = await get_client_async()
+    # Identical prompts already in flight share one upstream call
+    with timed("llm_call"):
+        response = await governor.call(key, lambda: client.chat.complete_async(
+            model=MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=TEMPERATURE,
+            response_format=response_format
+        ))
+
+    content = response.choices[0].message.content
+    if ttl > 0:
+        await llm_cache.set_async(key, content, ttl=ttl)
+    return content
+
+async def stream_mistral_async(prompt, prompt_type=None, response_format=None):
+    """Yield completion text deltas; a cached completion is yielded in one piece."""
+
+    ttl = _cache_ttl(prompt_type)
+    key = prompt_cache_key(prompt, response_format)
+    if ttl > 0:
+        cached = await llm_cache.get_async(key)
+        if cached is not None:
+            yield cached
+            return
+
+    client = await get_client_async()
+    start = time.perf_counter()
+    response, done = await governor.stream(lambda: client.chat.stream_async(
+        model=MODEL,
         messages=[
             {
                 "role": "user",
                 "content": prompt
             }
         ],
-        temperature=0.2
-    )
+        temperature=TEMPERATURE,
+        response_format=response_format
+    ))
+
+    parts = []
+    overloaded = False
+    try:
+        async for chunk in response:
+            delta = chunk.data.choices[0].delta.content
+            if isinstance(delta, str) and delta:
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        overloaded = is_retryable(e)
+        raise
+    finally:
+        await done(overloaded)
+        observe("llm_call", time.perf_counter() - start)
+
+    if ttl > 0:
+        await llm_cache.set_async(key, "".join(parts), ttl=ttl)
+
+CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+CLOSERS = {"{": "}", "[": "]"}
+
+
+def _scan_object(text):
+    """
+    (start, end, unclosed) of the first JSON object in text: braces inside
+    strings are skipped, and unclosed lists the closers a truncated object lacks.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    stack, in_string, escaped = [], False, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+            if not stack:
+                return start, i + 1, ""
+    return start, len(text), ('"' if in_string else "") + "".join(reversed(stack))
 
-    return response.choices[0].message.content
 
 def extract_json(text):
-    """Extract JSON from markdown code blocks or raw text."""
-    import re
-    
-    # Try to find JSON in markdown code blocks
-    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
-    if json_match:
-        return json_match.group(1)
-    
-    # Try to find JSON object directly
-    json_match = re.search(r'\{.*\}', text, re.DOTALL)
-    if json_match:
-        return json_match.group(0)
-    
-    return text
+    """Extract the first JSON object from markdown code blocks or raw text."""
+    fence = CODE_FENCE.search(text)
+    if fence and "{" in fence.group(1):
+        text = fence.group(1)
+    span = _scan_object(text)
+    return text[span[0]:span[1]] if span else text
+
+
+def repair_json(text):
+    """
+    Cheap fixes for the usual ways a model breaks JSON: prose or code fences
+    around the object, trailing commas, and output cut off mid-object.
+    """
+    fence = CODE_FENCE.search(text)
+    if fence and "{" in fence.group(1):
+        text = fence.group(1)
+    span = _scan_object(text)
+    if span is None:
+        return text
+    start, end, unclosed = span
+    return TRAILING_COMMA.sub(r"\1", text[start:end].rstrip().rstrip(",") + unclosed)
 
 
 # ================================
 # Resume + JD Analyzer Agent
 # ================================
 
+def parse_resume_score(raw):
+    """
+    Validate the LLM's resume analysis into a ResumeScore: in one pass when the
+    response is clean JSON (as JSON mode returns), else after repair_json.
+    """
+    with timed("llm_parse"):
+        try:
+            result = ResumeScore.model_validate_json(raw)
+            LLM_PARSE_RESULTS.inc(outcome="valid")
+            return result
+        except ValueError:
+            pass
+        try:
+            result = ResumeScore.model_validate_json(repair_json(raw))
+        except ValueError as e:
+            LLM_PARSE_RESULTS.inc(outcome="failed")
+            logger.warning(f"Raw LLM response:\n{raw}\n")
+            raise ValueError(f"LLM returned invalid JSON: {e}")
+        LLM_PARSE_RESULTS.inc(outcome="repaired")
+        return result
+
+
+def _parse_or_evict(raw, prompt):
+    # Never keep serving a cached response that failed validation
+    try:
+        return parse_resume_score(raw)
+    except Exception:
+        llm_cache.delete(prompt_cache_key(prompt, RESUME_SCORE_FORMAT))
+        raise
+
+
+async def _parse_or_evict_async(raw, prompt):
+    try:
+        return parse_resume_score(raw)
+    except Exception:
+        await llm_cache.delete_async(prompt_cache_key(prompt, RESUME_SCORE_FORMAT))
+        raise
+
+
+def _score_prompt(prompt):
+    """Resume analysis for a prompt; calls again (the bad response is evicted) if validation fails"""
+    for attempt in range(RESUME_SCORE_RETRIES + 1):
+        start = time.perf_counter()
+        raw = call_mistral(prompt, prompt_type="resume_score", response_format=RESUME_SCORE_FORMAT)
+        try:
+            return _parse_or_evict(raw, prompt)
+        except ValueError as e:
+            LLM_WASTED_SECONDS.inc(time.perf_counter() - start)
+            if attempt == RESUME_SCORE_RETRIES:
+                raise
+            logger.warning(f"Resume analysis rejected ({e}); calling Mistral again")
+
+
+async def _score_prompt_async(prompt):
+    """Async variant of _score_prompt"""
+    for attempt in range(RESUME_SCORE_RETRIES + 1):
+        start = time.perf_counter()
+        raw = await call_mistral_async(prompt, prompt_type="resume_score", response_format=RESUME_SCORE_FORMAT)
+        try:
+            return await _parse_or_evict_async(raw, prompt)
+        except ValueError as e:
+            LLM_WASTED_SECONDS.inc(time.perf_counter() - start)
+            if attempt == RESUME_SCORE_RETRIES:
+                raise
+            logger.warning(f"Resume analysis rejected ({e}); calling Mistral again")
+
+
+def build_resume_score_prompt(resume_text, jd_text):
+    resume_text, jd_text = fit_to_budget(resume_text, jd_text)
+    return resume_score_prompt.format(
+        resume=normalize_text(resume_text),
+        jd=normalize_text(jd_text)
+    )
+
+
 def analyze_resume_and_jd(resume_text, jd_url):
 
     jd_text = scrape_job_description(jd_url)
 
-    prompt = resume_score_prompt.format(
-        resume=resume_text,
-        jd=jd_text
+    prompt = build_resume_score_prompt(resume_text, jd_text)
+
+    return _score_prompt(prompt)
+
+
+async def analyze_resume_and_jd_async(resume_text, jd_url):
+
+    jd_text = await scrape_job_description_async(jd_url)
+
+    prompt = build_resume_score_prompt(resume_text, jd_text)
+
+    return await _score_prompt_async(prompt)
+
+
+SCORE_FIELD = re.compile(r'"score"\s*:\s*(\d+)\s*[,}\s]')
+
+
+async def stream_resume_analysis_async(resume_text, jd_url):
+    """
+    Yield ("score", int) as soon as the score field is complete in the streamed
+    output, then ("result", ResumeScore) once the whole response has arrived.
+    """
+
+    jd_text = await scrape_job_description_async(jd_url)
+
+    prompt = build_resume_score_prompt(resume_text, jd_text)
+
+    raw = ""
+    score_sent = False
+    start = time.perf_counter()
+    async for delta in stream_mistral_async(prompt, prompt_type="resume_score", response_format=RESUME_SCORE_FORMAT):
+        raw += delta
+        if not score_sent:
+            match = SCORE_FIELD.search(raw)
+            if match:
+                score_sent = True
+                yield "score", int(match.group(1))
+
+    # The score may already be out, so a stream is not re-requested on failure
+    try:
+        result = await _parse_or_evict_async(raw, prompt)
+    except ValueError:
+        LLM_WASTED_SECONDS.inc(time.perf_counter() - start)
+        raise
+    yield "result", result
+
+
+# ================================
+# Batch Resume Analyzer
+# ================================
+
+def build_batch_resume_score_prompt(resume_text, jd_texts):
+    jds = "\n\n".join(
+        f"Job Description {i}:\n{normalize_text(jd)}" for i, jd in enumerate(jd_texts, start=1)
     )
+    resume_text = truncate_to_tokens(resume_text, PROMPT_TOKEN_BUDGET // 2)
+    return batch_resume_score_prompt.format(resume=normalize_text(resume_text), jds=jds)
+
+
+def pack_job_descriptions(jd_texts, max_chars=BATCH_PROMPT_MAX_CHARS):
+    """Group JD indices so each group's combined text stays within max_chars."""
+    packs, current, size = [], [], 0
+    for index, text in enumerate(jd_texts):
+        if current and size + len(text) > max_chars:
+            packs.append(current)
+            current, size = [], 0
+        current.append(index)
+        size += len(text)
+    if current:
+        packs.append(current)
+    return packs
+
+
+def parse_batch_resume_scores(raw, count):
+    """Validate a batch response into `count` ResumeScores, in prompt order."""
+    with timed("llm_parse"):
+        try:
+            result = BatchResumeScores.model_validate_json(raw)
+        except ValueError:
+            result = BatchResumeScores.model_validate_json(repair_json(raw))
+        # Repeated or missing numbers would hand scores to the wrong job descriptions
+        numbers = sorted(item.jd for item in result.scores)
+        if numbers != list(range(1, count + 1)):
+            raise ValueError(f"LLM numbered job descriptions {numbers}, expected 1 to {count}")
+        return [ResumeScore(**item.model_dump(exclude={"jd"})) for item in sorted(result.scores, key=lambda item: item.jd)]
 
-    raw = call_mistral(prompt)
 
+async def _score_pack(resume_text, jd_texts):
+    """One ResumeScore per JD; after a rejected batch response, an exception in place of each JD that failed"""
+    if len(jd_texts) == 1:
+        prompt = build_resume_score_prompt(resume_text, jd_texts[0])
+        return [await _score_prompt_async(prompt)]
+
+    prompt = build_batch_resume_score_prompt(resume_text, jd_texts)
+    raw = await call_mistral_async(prompt, prompt_type="resume_score", response_format=BATCH_RESUME_SCORES_FORMAT)
     try:
-        json_text = extract_json(raw)
-        data = json.loads(json_text)
+        return parse_batch_resume_scores(raw, len(jd_texts))
     except Exception as e:
-        print(f"Raw LLM response:\n{raw}\n")
-        raise ValueError(f"LLM returned invalid JSON: {e}")
+        # Fall back to one call per JD rather than failing the whole pack
+        logger.warning(f"Batch analysis response rejected ({e}); scoring job descriptions individually")
+        await llm_cache.delete_async(prompt_cache_key(prompt, BATCH_RESUME_SCORES_FORMAT))
+        outcomes = await asyncio.gather(
+            *(_score_prompt_async(build_resume_score_prompt(resume_text, jd)) for jd in jd_texts),
+            return_exceptions=True
+        )
+        return list(outcomes)
+
+
+async def analyze_resume_batch_async(resumes, jd_urls):
+    """
+    Score every resume against every JD URL.
+    JDs are deduplicated and scraped concurrently, and several JDs are packed
+    into one LLM call when they fit. Returns one entry per (resume, jd_url) pair
+    with either a ResumeScore or an error message.
+    """
+
+    unique_urls = list(dict.fromkeys(normalize_url(url) for url in jd_urls))
+    first_url = {}
+    for url in jd_urls:
+        first_url.setdefault(normalize_url(url), url)
+
+    scraped = await asyncio.gather(
+        *(scrape_job_description_async(first_url[key]) for key in unique_urls),
+        return_exceptions=True
+    )
+    jd_texts = dict(zip(unique_urls, scraped))
+    ok_urls = [key for key in unique_urls if not isinstance(jd_texts[key], Exception)]
+
+    async def score_resume(resume_text):
+        texts = [jd_texts[key] for key in ok_urls]
+        packs = pack_job_descriptions(texts)
+        outcomes = await asyncio.gather(
+            *(_score_pack(resume_text, [texts[i] for i in pack]) for pack in packs),
+            return_exceptions=True
+        )
+        results = {}
+        for pack, outcome in zip(packs, outcomes):
+            for position, index in enumerate(pack):
+                results[ok_urls[index]] = outcome if isinstance(outcome, Exception) else outcome[position]
+        return results
 
-    validated = ResumeScore(**data)
+    per_resume = await asyncio.gather(*(score_resume(resume) for resume in resumes))
 
-    return validated
+    entries = []
+    for resume_index, results in enumerate(per_resume):
+        for url in jd_urls:
+            key = normalize_url(url)
+            outcome = jd_texts[key] if isinstance(jd_texts[key], Exception) else results[key]
+            if isinstance(outcome, Exception):
+                entries.append({"resume_index": resume_index, "jd_url": url, "result": None, "error": str(outcome)})
+            else:
+                entries.append({"resume_index": resume_index, "jd_url": url, "result": outcome, "error": None})
+    return entries
 
 
 # ================================
 # Tailored Answer Agent
 # ================================
 
+def build_tailored_answer_prompt(profile, jd_text, question):
+    profile, jd_text = fit_to_budget(profile, jd_text)
+    return tailored_answer_prompt.format(
+        profile=normalize_text(profile),
+        jd=normalize_text(jd_text),
+        question=normalize_text(question)
+    )
+
+
 def generate_tailored_answer(profile, jd_url, question):
 
     jd_text = scrape_job_description(jd_url)
 
-    prompt = tailored_answer_prompt.format(
-        profile=profile,
-        jd=jd_text,
-        question=question
+    prompt = build_tailored_answer_prompt(profile, jd_text, question)
+
+    return call_mistral(prompt, prompt_type="tailored_answer")
+
+
+async def generate_tailored_answer_async(profile, jd_url, question):
+
+    jd_text = await scrape_job_description_async(jd_url)
+
+    prompt = build_tailored_answer_prompt(profile, jd_text, question)
+
+    return await call_mistral_async(prompt, prompt_type="tailored_answer")
+
+
+async def stream_tailored_answer_async(profile, jd_url, question):
+    """Yield the answer text piece by piece as Mistral produces it."""
+
+    jd_text = await scrape_job_description_async(jd_url)
+
+    prompt = build_tailored_answer_prompt(profile, jd_text, question)
+
+    async for delta in stream_mistral_async(prompt, prompt_type="tailored_answer"):
+        yield delta
+
+
+# ================================
+# Multi-question Answer Agent
+# ================================
+
+def build_batch_tailored_answer_prompt(profile, jd_text, questions):
+    profile, jd_text = fit_to_budget(profile, jd_text)
+    numbered = "\n".join(f"{i}. {normalize_text(question)}" for i, question in enumerate(questions, start=1))
+    return batch_tailored_answer_prompt.format(
+        profile=normalize_text(profile),
+        jd=normalize_text(jd_text),
+        questions=numbered
     )
 
-    return call_mistral(prompt)
+
+def parse_batch_tailored_answers(raw, count):
+    """Validate a multi-question response into `count` answers, in question order."""
+    with timed("llm_parse"):
+        try:
+            result = TailoredAnswers.model_validate_json(raw)
+        except ValueError:
+            result = TailoredAnswers.model_validate_json(repair_json(raw))
+        answers = {item.question: item.answer.strip() for item in result.answers}
+        missing = [number for number in range(1, count + 1) if not answers.get(number)]
+        if missing:
+            raise ValueError(f"LLM returned no answer for questions {missing}")
+        return [answers[number] for number in range(1, count + 1)]
+
+
+async def _answer_pack(profile, jd_text, questions):
+    if len(questions) == 1:
+        prompt = build_tailored_answer_prompt(profile, jd_text, questions[0])
+        return [await call_mistral_async(prompt, prompt_type="tailored_answer")]
+
+    prompt = build_batch_tailored_answer_prompt(profile, jd_text, questions)
+    raw = await call_mistral_async(prompt, prompt_type="tailored_answer", response_format=TAILORED_ANSWERS_FORMAT)
+    try:
+        answers = parse_batch_tailored_answers(raw, len(questions))
+    except ValueError as e:
+        # Fall back to one call per question rather than failing the whole form
+        logger.warning(f"Multi-question response rejected ({e}); answering questions individually")
+        await llm_cache.delete_async(prompt_cache_key(prompt, TAILORED_ANSWERS_FORMAT))
+        return list(await asyncio.gather(*(_answer_pack(profile, jd_text, [q]) for q in questions)))
+
+    # Seed the single-question cache, so /api/generate/answer reuses these answers
+    ttl = _cache_ttl("tailored_answer")
+    if ttl > 0:
+        for question, answer in zip(questions, answers):
+            await llm_cache.set_async(
+                prompt_cache_key(build_tailored_answer_prompt(profile, jd_text, question)), answer, ttl=ttl
+            )
+    return answers
+
+
+async def generate_tailored_answers_async(profile, jd_url, questions):
+    """
+    Answer several application questions for one job; returns {question: answer}.
+    The JD is scraped once and up to ANSWER_BATCH_MAX_QUESTIONS questions share
+    one prompt, so the profile and JD are sent once per call instead of once per
+    question. Answers cached from earlier single-question calls are reused.
+    """
+
+    questions = list(dict.fromkeys(questions))
+    jd_text = await scrape_job_description_async(jd_url)
+
+    answers, pending = {}, []
+    ttl = _cache_ttl("tailored_answer")
+    for question in questions:
+        cached = None
+        if ttl > 0:
+            cached = await llm_cache.get_async(
+                prompt_cache_key(build_tailored_answer_prompt(profile, jd_text, question))
+            )
+        if cached is not None:
+            answers[question] = cached
+        else:
+            pending.append(question)
+
+    packs = [pending[i:i + ANSWER_BATCH_MAX_QUESTIONS] for i in range(0, len(pending), ANSWER_BATCH_MAX_QUESTIONS)]
+    results = await asyncio.gather(*(_answer_pack(profile, jd_text, pack) for pack in packs))
+    for pack, pack_answers in zip(packs, results):
+        answers.update(zip(pack, pack_answers))
+    return {question: answers[question] for question in questions}
@@ -0,0 +1,246 @@
+"""
+Two-tier cache: in-process LRU in front of an optional on-disk SQLite table
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float
+    size: int = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class MemoryTier:
+    """Bounded LRU map, evicts least recently used entries first by count and total size"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self.delete(key)
+        self._data[key] = entry
+        self.total_bytes += entry.size
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes and len(self._data) > 1
+        ):
+            _, evicted = self._data.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    def delete(self, key: str):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def clear(self):
+        self._data.clear()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteTier:
+    """
+    Persistent key/value table, values stored as JSON; pruned soonest-expiring first when over max_bytes.
+    Safe to share between threads: the connection is used under its own lock.
+    """
+
+    PRUNE_EVERY = 64
+
+    def __init__(self, path: str, table: str, max_bytes: Optional[int] = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.table = table
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], len(row[0]))
+
+    def set(self, key: str, entry: CacheEntry, payload: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload if payload is not None else json.dumps(entry.value), entry.expires_at)
+            )
+            self._conn.commit()
+
+            self._writes += 1
+            if self.max_bytes is not None and self._writes % self.PRUNE_EVERY == 0:
+                self._prune()
+
+    def prune(self):
+        with self._lock:
+            self._prune()
+
+    def _prune(self):
+        """Delete soonest-expiring rows until the table fits in max_bytes"""
+        total = self._conn.execute(f"SELECT COALESCE(SUM(length(value)), 0) FROM {self.table}").fetchone()[0]
+        if self.max_bytes is None or total <= self.max_bytes:
+            return
+        rows = self._conn.execute(f"SELECT key, length(value) FROM {self.table} ORDER BY expires_at")
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", doomed)
+        self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+
+class TieredCache:
+    """
+    LRU memory tier backed by an optional SQLite tier.
+    Expired entries are kept (not returned as fresh) so callers can revalidate them.
+    The *_async methods run disk reads and writes on a worker thread, so a memory
+    miss does not block the event loop on SQLite.
+    """
+
+    def __init__(self, name: str, ttl: float, memory: MemoryTier, disk: Optional[SQLiteTier] = None):
+        self.name = name
+        self.ttl = ttl
+        self.memory = memory
+        self.disk = disk
+        # Guards the memory tier and stats; the disk tier has its own lock
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0}
+
+    def _memory_get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            return self.memory.get(key)
+
+    def _found(self, key: str, entry: Optional[CacheEntry], from_disk: bool) -> Optional[CacheEntry]:
+        with self._lock:
+            if from_disk and entry is not None:
+                self.memory.set(key, entry)
+            if entry is None:
+                self._stats["misses"] += 1
+            elif entry.fresh:
+                self._stats["hits"] += 1
+            else:
+                self._stats["stale"] += 1
+        return entry
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry (fresh or stale) and record a hit, stale hit or miss"""
+        entry = self._memory_get(key)
+        if entry is not None or self.disk is None:
+            return self._found(key, entry, False)
+        return self._found(key, self.disk.get(key), True)
+
+    async def lookup_async(self, key: str) -> Optional[CacheEntry]:
+        entry = self._memory_get(key)
+        if entry is not None or self.disk is None:
+            return self._found(key, entry, False)
+        return self._found(key, await asyncio.to_thread(self.disk.get, key), True)
+
+    def get(self, key: str) -> Any:
+        """Return the cached value if still fresh, else None"""
+        entry = self.lookup(key)
+        return entry.value if entry is not None and entry.fresh else None
+
+    async def get_async(self, key: str) -> Any:
+        entry = await self.lookup_async(key)
+        return entry.value if entry is not None and entry.fresh else None
+
+    def _memory_set(self, key: str, value: Any, ttl: Optional[float]):
+        payload = json.dumps(value)
+        entry = CacheEntry(value, time.time() + (self.ttl if ttl is None else ttl), len(payload))
+        with self._lock:
+            self.memory.set(key, entry)
+        return entry, payload
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        entry, payload = self._memory_set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, entry, payload)
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[float] = None):
+        entry, payload = self._memory_set(key, value, ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, entry, payload)
+
+    def delete(self, key: str):
+        with self._lock:
+            self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    async def delete_async(self, key: str):
+        with self._lock:
+            self.memory.delete(key)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.delete, key)
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def record(self, counter: str):
+        """Bump a caller-defined counter (e.g. revalidations)"""
+        with self._lock:
+            self._stats[counter] = self._stats.get(counter, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self.memory), "bytes": self.memory.total_bytes}
+
+
+def build_cache(name: str, ttl: float, max_entries: int, path: Optional[str] = None,
+                max_bytes: Optional[int] = None, disk_max_bytes: Optional[int] = None) -> TieredCache:
+    """Create a TieredCache; an empty path disables the SQLite tier"""
+    if path is None:
+        path = os.path.join(CACHE_DIR, f"{name}.sqlite3")
+    disk = SQLiteTier(path, f"{name}_cache", disk_max_bytes) if path else None
+    return TieredCache(name, ttl, MemoryTier(max_entries, max_bytes), disk)
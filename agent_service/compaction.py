@@ -0,0 +1,146 @@
+"""
+Token-aware compaction of job descriptions and resumes before they go into a prompt
+"""
+
+import math
+import os
+import re
+from typing import List, Tuple
+
+# Tokens of resume + job description text allowed in one prompt (the template is extra)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 3000))
+# Tokens kept from a scraped job description
+JD_MAX_TOKENS = int(os.getenv("JD_MAX_TOKENS", 1500))
+# Tokens kept from the text before the first section heading (title, company, summary)
+JD_INTRO_MAX_TOKENS = 200
+
+BLOCK_TAGS = ["h1", "h2", "h3", "h4", "h5", "h6", "p", "li", "dt", "dd", "td", "th", "div", "section", "article"]
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "dt", "th"}
+
+RELEVANT_HEADING = re.compile(
+    r"requirement|responsibilit|qualification|what you.{0,8}(do|bring|need|have)|looking for|skills|"
+    r"experience|must.have|nice.to.have|preferred|the role|your role|role overview|job description|"
+    r"duties|tech stack|about the job|about the position|you will|you'll",
+    re.IGNORECASE,
+)
+IRRELEVANT_HEADING = re.compile(
+    r"benefit|perks|about us|about the company|who we are|our company|our values|our culture|life at|"
+    r"equal opportunit|diversity|privacy|how to apply|compensation|salary|pay range|why join|why work|^about\b",
+    re.IGNORECASE,
+)
+BOILERPLATE_LINE = re.compile(
+    r"equal opportunity employer|all qualified applicants|reasonable accommodation|cookie|privacy policy|"
+    r"all rights reserved|terms of (use|service)|apply now|apply for this job|sign in|join now|share this job|"
+    r"report this job|similar jobs|show more|show less|save job",
+    re.IGNORECASE,
+)
+
+TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local estimate of the Mistral token count without loading a tokenizer:
+    one token per punctuation mark and per started 6 characters of each word
+    """
+    return sum(math.ceil(len(piece) / 6) for piece in TOKEN_PIECE.findall(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep whole lines of text up to max_tokens; only an oversized first line is cut mid-line"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            if not kept:
+                words = []
+                for word in line.split():
+                    used += estimate_tokens(word)
+                    if used > max_tokens:
+                        break
+                    words.append(word)
+                kept.append(" ".join(words))
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def fit_to_budget(resume: str, jd: str, budget: int = PROMPT_TOKEN_BUDGET) -> Tuple[str, str]:
+    """Trim resume and job description so together they fit budget; the shorter one keeps its full text"""
+    resume_tokens, jd_tokens = estimate_tokens(resume), estimate_tokens(jd)
+    if resume_tokens + jd_tokens <= budget:
+        return resume, jd
+
+    half = budget // 2
+    if resume_tokens <= half:
+        return resume, truncate_to_tokens(jd, budget - resume_tokens)
+    if jd_tokens <= half:
+        return truncate_to_tokens(resume, budget - jd_tokens), jd
+    return truncate_to_tokens(resume, half), truncate_to_tokens(jd, budget - half)
+
+
+def _block_lines(soup) -> List[Tuple[str, bool]]:
+    """(text, is_heading) for each innermost block element, in document order"""
+    lines = []
+    for element in soup.find_all(BLOCK_TAGS):
+        if element.find(BLOCK_TAGS) is not None:
+            continue
+        text = " ".join(element.get_text(separator=" ").split())
+        if not text:
+            continue
+        is_heading = element.name in HEADING_TAGS
+        if not is_heading and element.name != "li" and len(text) <= 60:
+            # Short paragraphs ending in ":" or wholly in bold are headings on most job boards
+            bold = element.find(["strong", "b"])
+            is_heading = text.endswith(":") or (bold is not None and " ".join(bold.get_text().split()) == text)
+        lines.append((text, is_heading))
+    return lines
+
+
+def compact_job_description(soup, max_tokens: int = JD_MAX_TOKENS) -> str:
+    """
+    Reduce a parsed job page (noise tags already removed) to its relevant sections:
+    the intro, then requirements/responsibilities/qualifications-style sections,
+    then any other titled content. Benefits, company blurbs, legal text and
+    repeated lines are dropped. Returns newline-separated lines within max_tokens.
+    """
+    seen = set()
+    intro = []
+    sections = {"relevant": [], "other": []}
+    current = intro
+    for text, is_heading in _block_lines(soup):
+        key = text.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+
+        if is_heading:
+            if RELEVANT_HEADING.search(text):
+                current = [text]
+                sections["relevant"].append(current)
+            elif IRRELEVANT_HEADING.search(text) or BOILERPLATE_LINE.search(text):
+                current = None
+            elif current is not intro:
+                current = [text]
+                sections["other"].append(current)
+            else:
+                # Title-like headings before the first section stay in the intro
+                intro.append(text)
+            continue
+
+        if current is not None and not BOILERPLATE_LINE.search(text):
+            current.append(text)
+
+    # A heading without content (e.g. an empty criteria label) is not worth its tokens
+    relevant = [line for section in sections["relevant"] if len(section) > 1 for line in section]
+    other = [line for section in sections["other"] if len(section) > 1 for line in section]
+    if not intro and not relevant and not other:
+        # No block structure at all: fall back to the page text
+        return truncate_to_tokens(" ".join(soup.get_text(separator=" ").split()), max_tokens)
+
+    parts = [truncate_to_tokens("\n".join(intro), JD_INTRO_MAX_TOKENS), "\n".join(relevant), "\n".join(other)]
+    return truncate_to_tokens("\n".join(part for part in parts if part), max_tokens)
@@ -0,0 +1,226 @@
+"""
+Near-duplicate job postings: MinHash signatures with LSH banding.
+
+Reposted and syndicated roles differ in URL and a few words of the title or
+description. Each posting's title, company and description are normalized
+and cut into character shingles; a MinHash signature of NUM_PERM values
+estimates the Jaccard similarity of two shingle sets as the share of equal
+values. Signatures are split into bands, and only postings that collide on a
+whole band are compared, so finding a posting's duplicates does not scan
+every posting seen so far. Bands are keyed by location too: the same role in
+another city is a separate posting, which a location filter may be looking for.
+"""
+
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import registry, timed
+
+JOB_DEDUP = os.getenv("JOB_DEDUP", "1") != "0"
+# Estimated Jaccard similarity of the shingle sets above which two postings are one role
+JOB_DEDUP_THRESHOLD = float(os.getenv("JOB_DEDUP_THRESHOLD", 0.8))
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs collide in some band with probability ~95% at 0.8 similarity,
+# ~99% at 0.85 and under 6% at 0.5, so few dissimilar pairs are compared
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+# Signatures kept for postings seen recently, e.g. the stored corpus searched again
+SIGNATURE_CACHE_SIZE = 4096
+
+# Multiply-shift hashes: the top 32 bits of (a * x + b) mod 2**64, a odd
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+# Odd multiplier mixing bucket parts into one 64-bit key (wrapping arithmetic)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+NON_WORD = re.compile(r"[\W_]+")
+
+DUPLICATES = registry.counter("job_duplicates_total", "Near-duplicate postings collapsed into a canonical posting")
+
+
+def job_text(job: Dict) -> str:
+    """Normalized title, company and description of a posting"""
+    text = f"{job.get('title') or ''} {job.get('company') or ''} {job.get('description') or ''}"
+    return NON_WORD.sub(" ", text.lower()).strip()
+
+
+def job_location(job: Dict) -> str:
+    """Normalized location of a posting; only postings with equal locations can be duplicates"""
+    return NON_WORD.sub(" ", (job.get("location") or "").lower()).strip()
+
+
+@lru_cache(maxsize=SIGNATURE_CACHE_SIZE)
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (uint32 x NUM_PERM) of the SHINGLE_SIZE-byte shingles of a normalized text"""
+    data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+    if len(data) < SHINGLE_SIZE:
+        data = np.pad(data, (0, SHINGLE_SIZE - len(data)))
+    # Each shingle's bytes packed into one integer
+    count = len(data) - SHINGLE_SIZE + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for k in range(SHINGLE_SIZE):
+        shingles |= data[k:k + count] << np.uint64(8 * k)
+    shingles = np.unique(shingles)
+    hashes = (_A[:, None] * shingles[None, :] + _B[:, None]) >> np.uint64(32)
+    signature = hashes.min(axis=1).astype(np.uint32)
+    signature.flags.writeable = False
+    return signature
+
+
+def signature_from_bytes(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Stored signature, or None if missing or computed with a different NUM_PERM"""
+    if not data or len(data) != NUM_PERM * 4:
+        return None
+    return np.frombuffer(data, dtype=np.uint32)
+
+
+def job_signature(job: Dict) -> np.ndarray:
+    """Signature stored with the posting (see crud.upsert_job_postings), else computed"""
+    signature = signature_from_bytes(job.get("minhash"))
+    return signature if signature is not None else minhash(job_text(job))
+
+
+def _bucket_keys(signatures: np.ndarray, locations: List[str]) -> np.ndarray:
+    """
+    (postings x BANDS) uint64 keys of the (location, band) buckets a DuplicateIndex files
+    each posting under. Equal buckets give equal keys; a rare key collision only adds a pair.
+    """
+    keys = np.array([zlib.crc32(job_location({"location": location}).encode()) for location in locations],
+                    dtype=np.uint64)
+    keys = keys[:, None] * _MIX + np.arange(BANDS, dtype=np.uint64)
+    rows = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    for row in range(ROWS):
+        keys = keys * _MIX + rows[:, :, row]
+    return keys
+
+
+def duplicate_pairs(signatures: np.ndarray, locations: List[str],
+                    threshold: float = JOB_DEDUP_THRESHOLD) -> np.ndarray:
+    """
+    (pairs x 2) indices of postings that share a bucket and whose estimated similarity
+    reaches threshold: the only pairs a DuplicateIndex can ever match
+    """
+    keys = _bucket_keys(signatures, locations)
+    count = len(signatures)
+    pairs = [np.zeros(0, dtype=np.int64)]
+    for band in range(BANDS):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        # Postings of a bucket are adjacent once sorted: pair each with the ones offset after it
+        for offset in range(1, count):
+            same = np.flatnonzero(sorted_keys[offset:] == sorted_keys[:-offset])
+            if not len(same):
+                break
+            first, second = order[same], order[same + offset]
+            pairs.append(np.minimum(first, second).astype(np.int64) * count + np.maximum(first, second))
+    pairs = np.unique(np.concatenate(pairs))
+    pairs = np.stack([pairs // count, pairs % count], axis=1)
+    similar = np.concatenate([
+        np.count_nonzero(signatures[chunk[:, 0]] == signatures[chunk[:, 1]], axis=1) / NUM_PERM >= threshold
+        for chunk in np.array_split(pairs, max(1, len(pairs) // 100000))
+    ]) if len(pairs) else np.zeros(0, dtype=bool)
+    return pairs[similar]
+
+
+def duplicate_closure(pairs: np.ndarray, seeds: np.ndarray) -> np.ndarray:
+    """
+    Mask of the seed postings and every posting linked to one by duplicate_pairs, transitively.
+    dedupe_jobs only matches postings within such a group, so deduplicating the group alone
+    gives the same canonical postings for it as deduplicating everything.
+    """
+    members = seeds.copy()
+    while True:
+        leaving = members[pairs[:, 0]] != members[pairs[:, 1]]
+        if not leaving.any():
+            return members
+        members[pairs[leaving].ravel()] = True
+
+
+class DuplicateIndex:
+    """
+    Canonical postings seen so far, bucketed by signature band.
+    add() keeps the first posting of each role and files later near-duplicates
+    under it as alternate_urls.
+    """
+
+    def __init__(self, threshold: float = JOB_DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.jobs: List[Dict] = []
+        # One row per canonical posting; grown by doubling
+        self._signatures = np.zeros((16, NUM_PERM), dtype=np.uint32)
+        self._buckets: Dict[Tuple[str, int, bytes], List[int]] = {}
+
+    @staticmethod
+    def _bands(signature: np.ndarray, location: str = "") -> List[Tuple[str, int, bytes]]:
+        data = signature.tobytes()
+        width = ROWS * signature.itemsize
+        return [(location, band, data[band * width:(band + 1) * width]) for band in range(BANDS)]
+
+    def find(self, signature: np.ndarray, bands: Optional[List[Tuple[str, int, bytes]]] = None,
+             location: str = "") -> Optional[int]:
+        """Index of the most similar canonical posting in location above the threshold, if any"""
+        bands = bands if bands is not None else self._bands(signature, location)
+        candidates = sorted({i for key in bands for i in self._buckets.get(key, ())})
+        if not candidates:
+            return None
+        estimates = np.count_nonzero(self._signatures[candidates] == signature, axis=1) / NUM_PERM
+        best = int(np.argmax(estimates))
+        return candidates[best] if estimates[best] >= self.threshold else None
+
+    def add(self, job: Dict) -> Tuple[Dict, bool]:
+        """
+        (canonical posting, True if job is new). A new job is stored as a copy with
+        an empty alternate_urls list; a duplicate's URL is appended to its canonical's.
+        """
+        signature = job_signature(job)
+        bands = self._bands(signature, job_location(job))
+        match = self.find(signature, bands)
+        if match is not None:
+            canonical = self.jobs[match]
+            url = job.get("url")
+            if url and url != canonical.get("url") and url not in canonical["alternate_urls"]:
+                canonical["alternate_urls"].append(url)
+            DUPLICATES.inc()
+            return canonical, False
+
+        canonical = {**job, "alternate_urls": list(job.get("alternate_urls") or [])}
+        if len(self.jobs) == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+        self._signatures[len(self.jobs)] = signature
+        self.jobs.append(canonical)
+        for key in bands:
+            self._buckets.setdefault(key, []).append(len(self.jobs) - 1)
+        return canonical, True
+
+
+def dedupe_jobs(jobs: List[Dict], threshold: float = JOB_DEDUP_THRESHOLD) -> List[Dict]:
+    """
+    Collapse near-duplicate postings, keeping each role's most detailed posting
+    (longest description) with the others' URLs in alternate_urls
+    """
+    if not JOB_DEDUP or len(jobs) < 2:
+        return jobs
+    with timed("job_dedup"):
+        signatures = np.stack([job_signature(job) for job in jobs])
+        pairs = duplicate_pairs(signatures, [job.get("location") or "" for job in jobs], threshold)
+        # A posting without a possible duplicate is its own role; only the others go through the index
+        linked = np.zeros(len(jobs), dtype=bool)
+        linked[pairs.ravel()] = True
+        roles = [(i, {**jobs[i], "alternate_urls": list(jobs[i].get("alternate_urls") or [])})
+                 for i in np.flatnonzero(~linked).tolist()]
+
+        index = DuplicateIndex(threshold)
+        # Each role takes the position of its first posting in jobs
+        position = {}
+        for i in sorted(np.flatnonzero(linked).tolist(), key=lambda i: -len(jobs[i].get("description") or "")):
+            canonical, _ = index.add(jobs[i])
+            position[id(canonical)] = min(i, position.get(id(canonical), i))
+        roles.extend((position[id(job)], job) for job in index.jobs)
+        return [job for _, job in sorted(roles, key=lambda role: role[0])]
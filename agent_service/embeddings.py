@@ -0,0 +1,259 @@
+"""
+Local semantic matching: hashed TF-IDF embeddings and a memory-mapped IVF index.
+
+Texts are embedded without a model by hashing words (and catalog skill IDs,
+so aliases like "k8s" land on "Kubernetes") into EMBEDDING_DIM signed buckets.
+Vectors are stored raw (sublinear term frequency); the index applies IDF
+weights learned from the stored postings and L2-normalizes, so cosine
+similarity is a dot product.
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import CACHE_DIR
+from .skills import extract_skill_ids
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 512))
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", os.path.join(CACHE_DIR, "vectors"))
+# Clusters scanned per query; more is slower and closer to exact search
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", 32))
+# Below this many postings the index is searched exhaustively
+IVF_MIN_ROWS = 4096
+KMEANS_ITERATIONS = 8
+SKILL_WEIGHT = 2.0
+
+WORD = re.compile(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our the this to we will with you your".split()
+)
+
+
+def _bucket(token: str) -> Tuple[int, float]:
+    h = zlib.crc32(token.encode("utf-8"))
+    return h % EMBEDDING_DIM, (1.0 if h & 0x80000000 else -1.0)
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Raw hashed term-frequency vector (float32) of a text"""
+    counts: Dict[str, float] = {}
+    for word in WORD.findall(text.lower()):
+        if word not in STOPWORDS:
+            counts[word] = counts.get(word, 0) + 1
+    for sid in extract_skill_ids(text):
+        counts[f"skill:{sid}"] = counts.get(f"skill:{sid}", 0) + SKILL_WEIGHT
+
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token, count in counts.items():
+        bucket, sign = _bucket(token)
+        vector[bucket] += sign * (1 + math.log(count))
+    return vector
+
+
+def embed_job(job: Dict) -> np.ndarray:
+    """Embedding of a job dict; the title counts twice"""
+    skills = " ".join(job.get("required_skills") or [])
+    return embed_text(f"{job['title']}\n{job['title']}\n{job.get('description') or ''}\n{skills}")
+
+
+def vector_from_bytes(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """Stored vector, or None if missing or embedded with a different EMBEDDING_DIM"""
+    if not data or len(data) != EMBEDDING_DIM * 4:
+        return None
+    return np.frombuffer(data, dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def idf_weights(raw_vectors: np.ndarray) -> np.ndarray:
+    """Smoothed IDF weight of each bucket over a matrix of raw posting vectors"""
+    df = np.count_nonzero(raw_vectors, axis=0)
+    return (np.log((1 + len(raw_vectors)) / (1 + df)) + 1).astype(np.float32)
+
+
+def weighted_unit_vectors(raw_vectors: np.ndarray, idf: np.ndarray) -> np.ndarray:
+    """IDF-weighted, L2-normalized float32 vectors, whose dot products are cosine similarities"""
+    return _normalize(raw_vectors * idf).astype(np.float32)
+
+
+class VectorIndex:
+    """
+    Inverted-file (IVF) index over memory-mapped, IDF-weighted unit vectors.
+    Rows are stored grouped by k-means cluster, so probing a cluster reads one
+    contiguous slice of the matrix.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.ids = np.load(os.path.join(path, "ids.npy"))
+        self.idf = np.load(os.path.join(path, "idf.npy"))
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.vectors = np.memmap(
+            os.path.join(path, "vectors.f32"), dtype=np.float32, mode="r", shape=(self.count, EMBEDDING_DIM)
+        )
+
+    @staticmethod
+    def build(path: str, ids: Iterable[int], raw_vectors: np.ndarray, seed: int = 0) -> str:
+        """Write an index for raw vectors to a new directory under path; returns that directory"""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        count = len(ids)
+        idf = idf_weights(raw_vectors)
+        vectors = weighted_unit_vectors(raw_vectors, idf)
+
+        clusters = max(1, int(math.sqrt(count))) if count >= IVF_MIN_ROWS else 1
+        centroids, labels = _spherical_kmeans(vectors, clusters, seed)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(clusters + 1))
+
+        target = os.path.join(path, f"index-{time.time_ns()}")
+        os.makedirs(target)
+        memmap = np.memmap(os.path.join(target, "vectors.f32"), dtype=np.float32, mode="w+",
+                           shape=(max(count, 1), EMBEDDING_DIM))
+        memmap[:count] = vectors[order]
+        memmap.flush()
+        del memmap
+        np.save(os.path.join(target, "ids.npy"), ids[order])
+        np.save(os.path.join(target, "idf.npy"), idf)
+        np.save(os.path.join(target, "centroids.npy"), centroids)
+        np.save(os.path.join(target, "offsets.npy"), offsets)
+        with open(os.path.join(target, "meta.json"), "w") as f:
+            json.dump({"count": count, "dim": EMBEDDING_DIM, "clusters": clusters}, f)
+        return target
+
+    def query_vector(self, raw: np.ndarray) -> np.ndarray:
+        return weighted_unit_vectors(raw, self.idf)
+
+    def search(self, raw: np.ndarray, k: int = 100, nprobe: int = IVF_NPROBE) -> Tuple[np.ndarray, np.ndarray]:
+        """(posting ids, cosine similarities) of the approximately k most similar postings, best first"""
+        if self.count == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = self.query_vector(raw)
+
+        clusters = len(self.centroids)
+        if nprobe < clusters:
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in probe])
+            sims = self.vectors[rows] @ query
+        else:
+            rows = None
+            sims = self.vectors[:self.count] @ query
+
+        if k < len(sims):
+            best = np.argpartition(-sims, k - 1)[:k]
+        else:
+            best = np.arange(len(sims))
+        best = best[np.argsort(-sims[best], kind="stable")]
+        found = best if rows is None else rows[best]
+        return self.ids[found], sims[best]
+
+    def similarities(self, raw: np.ndarray, raw_vectors: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a query to vectors outside the index, with the index's IDF weights"""
+        return self.query_vector(raw_vectors) @ self.query_vector(raw)
+
+
+def _spherical_kmeans(vectors: np.ndarray, clusters: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Cluster unit vectors by cosine; returns (unit centroids, label per row)"""
+    count = len(vectors)
+    if clusters == 1 or count == 0:
+        centroid = _normalize(vectors.sum(axis=0, keepdims=True)) if count else np.zeros((1, EMBEDDING_DIM))
+        return centroid.astype(np.float32), np.zeros(count, dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(count, clusters, replace=False)].copy()
+    labels = np.zeros(count, dtype=np.int64)
+    for _ in range(KMEANS_ITERATIONS):
+        # Assign in chunks to bound the (rows x clusters) similarity matrix
+        for start in range(0, count, 8192):
+            labels[start:start + 8192] = np.argmax(vectors[start:start + 8192] @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        empty = ~sums.any(axis=1)
+        # Reseed empty clusters with random rows
+        sums[empty] = vectors[rng.choice(count, int(empty.sum()), replace=False)]
+        centroids = _normalize(sums).astype(np.float32)
+    return centroids, labels
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def _current_path() -> Optional[str]:
+    try:
+        with open(os.path.join(EMBEDDING_INDEX_DIR, "CURRENT")) as f:
+            return os.path.join(EMBEDDING_INDEX_DIR, f.read().strip())
+    except FileNotFoundError:
+        return None
+
+
+def get_index() -> Optional[VectorIndex]:
+    """The latest built index (picking up rebuilds by other processes), or None if there is none"""
+    global _index
+    for attempt in range(2):
+        path = _current_path()
+        if path is None:
+            return None
+        if _index is not None and _index.path == path:
+            return _index
+        with _index_lock:
+            if _index is None or _index.path != path:
+                try:
+                    _index = VectorIndex(path)
+                except FileNotFoundError:
+                    # Rebuilt twice since CURRENT was read, so this directory is gone; read it again
+                    if attempt:
+                        raise
+                    continue
+            return _index
+
+
+def publish_index(ids: Iterable[int], raw_vectors: np.ndarray) -> VectorIndex:
+    """
+    Build an index and make it current. The previous index is kept for readers that
+    read CURRENT just before it changed; older index directories are removed.
+    """
+    os.makedirs(EMBEDDING_INDEX_DIR, exist_ok=True)
+    target = VectorIndex.build(EMBEDDING_INDEX_DIR, ids, raw_vectors)
+    previous = _current_path()
+    pointer = os.path.join(EMBEDDING_INDEX_DIR, "CURRENT.tmp")
+    with open(pointer, "w") as f:
+        f.write(os.path.basename(target))
+    os.replace(pointer, os.path.join(EMBEDDING_INDEX_DIR, "CURRENT"))
+
+    keep = {os.path.basename(target), os.path.basename(previous or "")}
+    for name in os.listdir(EMBEDDING_INDEX_DIR):
+        # Readers that still map an old index keep their open file handles
+        if name.startswith("index-") and name not in keep:
+            shutil.rmtree(os.path.join(EMBEDDING_INDEX_DIR, name), ignore_errors=True)
+    return get_index()
+
+
+def job_similarities(query: np.ndarray, jobs: List[Dict]) -> np.ndarray:
+    """Cosine similarity of a raw query vector to each job; uses a job's precomputed "similarity" if present"""
+    sims = np.array([job.get("similarity", np.nan) for job in jobs], dtype=np.float32)
+    missing = np.flatnonzero(np.isnan(sims))
+    if len(missing):
+        raw = np.stack([embed_job(jobs[i]) for i in missing])
+        index = get_index()
+        if index is not None:
+            sims[missing] = index.similarities(query, raw)
+        else:
+            sims[missing] = _normalize(raw) @ _normalize(query)
+    return sims
@@ -0,0 +1,311 @@
+"""
+Call governance for the LLM provider: adaptive (AIMD) concurrency limit,
+single-flight coalescing of identical prompts, retries with jittered backoff
+(never shorter than the provider's Retry-After) and a circuit breaker that
+fails fast during outages
+"""
+
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+# Status codes that mean "provider overloaded / temporarily broken"
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while the circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM provider unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUSES
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the provider asked to wait in the Retry-After header of a failed call, if any"""
+    # Mistral SDK errors carry the httpx response as raw_response, httpx's own as response
+    response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+    value = getattr(response, "headers", {}).get("Retry-After", "").strip()
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AIMDLimiter:
+    """
+    Concurrency cap that grows by ~1 per window of successful calls and halves
+    whenever the provider signals overload (additive increase, multiplicative decrease)
+    """
+
+    def __init__(self, initial: float, minimum: float, maximum: float):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.waiting = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def release(self, overloaded: bool):
+        async with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `reset_timeout` lets one trial call through"""
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError, or admit the call; True if it is the half-open trial"""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_running):
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(max(remaining, 1.0))
+        if state == "half_open":
+            self._trial_running = True
+            return True
+        return False
+
+    def abandon(self, trial: bool):
+        """An admitted call ended without a verdict (e.g. cancelled); a trial may be retried"""
+        if trial:
+            self._trial_running = False
+
+    def record(self, success: bool):
+        self._trial_running = False
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class Governor:
+    def __init__(self, initial_concurrency: float = 8, min_concurrency: float = 1, max_concurrency: float = 32,
+                 max_retries: int = 3, backoff_base: float = 0.5, max_retry_after: float = 30.0,
+                 breaker_threshold: int = 5, breaker_reset: float = 30.0):
+        self.limiter = AIMDLimiter(initial_concurrency, min_concurrency, max_concurrency)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_retry_after = max_retry_after
+        # key -> [task running the upstream call, number of callers awaiting it]
+        self._in_flight: Dict[str, list] = {}
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+    async def call(self, key: str, fn: Callable[[], Awaitable]):
+        """
+        Run fn under governance; concurrent calls with the same key share one upstream call.
+        The upstream call runs in its own task, so a caller that goes away (e.g. a client
+        disconnect) does not cancel it for the others; it is cancelled once no caller is left.
+        """
+        shared = self._in_flight.get(key)
+        if shared is None:
+            task = asyncio.ensure_future(self._call_with_retries(fn))
+            shared = self._in_flight[key] = [task, 0]
+            task.add_done_callback(lambda done: self._forget(key, shared, done))
+        else:
+            self.stats["coalesced"] += 1
+        task = shared[0]
+        shared[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            shared[1] -= 1
+            if shared[1] == 0 and not task.done():
+                # Later identical calls start afresh rather than join a cancelled call
+                self._forget(key, shared, task)
+                task.cancel()
+
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Exponential backoff with full jitter, but at least the provider's Retry-After;
+        None when that exceeds max_retry_after and the call should fail instead
+        """
+        backoff = random.uniform(0, self.backoff_base * (2 ** attempt))
+        wait = retry_after(error)
+        if wait is None:
+            return backoff
+        return max(wait, backoff) if wait <= self.max_retry_after else None
+
+    def _forget(self, key: str, shared: list, task: asyncio.Task):
+        if self._in_flight.get(key) is shared:
+            del self._in_flight[key]
+        if task.done() and not task.cancelled():
+            # Mark the exception retrieved when no caller is left to see it
+            task.exception()
+
+    async def _call_with_retries(self, fn):
+        for attempt in range(self.max_retries + 1):
+            try:
+                trial = self.breaker.before_call()
+            except CircuitOpenError:
+                self.stats["rejected"] += 1
+                raise
+
+            try:
+                await self.limiter.acquire()
+            except BaseException:
+                self.breaker.abandon(trial)
+                raise
+            self.stats["calls"] += 1
+            overloaded = False
+            try:
+                result = await fn()
+                self.breaker.record(success=True)
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    # The provider answered; a bad request is not an outage
+                    self.breaker.record(success=True)
+                    raise
+                overloaded = True
+                self.stats["failures"] += 1
+                self.breaker.record(success=False)
+                delay = self._retry_delay(attempt, e)
+                if attempt == self.max_retries or delay is None:
+                    raise
+            except BaseException:
+                # Cancelled: no verdict on the provider
+                self.breaker.abandon(trial)
+                raise
+            finally:
+                await self.limiter.release(overloaded)
+
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def call_sync(self, fn: Callable):
+        """Blocking variant for scripts: breaker and retries, but no concurrency limit or coalescing"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                trial = self.breaker.before_call()
+            except CircuitOpenError:
+                self.stats["rejected"] += 1
+                raise
+            self.stats["calls"] += 1
+            try:
+                result = fn()
+                self.breaker.record(success=True)
+                return result
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record(success=True)
+                    raise
+                self.stats["failures"] += 1
+                self.breaker.record(success=False)
+                delay = self._retry_delay(attempt, e)
+                if attempt == self.max_retries or delay is None:
+                    raise
+            except BaseException:
+                self.breaker.abandon(trial)
+                raise
+            self.stats["retries"] += 1
+            time.sleep(delay)
+
+    async def stream(self, fn: Callable[[], Awaitable]):
+        """
+        Open a streaming call under the breaker and concurrency limit.
+        Returns (stream, done) where done(overloaded) must be awaited when the stream ends.
+        Streams are not retried or coalesced once they have started.
+        """
+        try:
+            trial = self.breaker.before_call()
+        except CircuitOpenError:
+            self.stats["rejected"] += 1
+            raise
+        try:
+            await self.limiter.acquire()
+        except BaseException:
+            self.breaker.abandon(trial)
+            raise
+        self.stats["calls"] += 1
+        try:
+            stream = await fn()
+        except Exception as e:
+            retryable = is_retryable(e)
+            if retryable:
+                self.stats["failures"] += 1
+            self.breaker.record(success=not retryable)
+            await self.limiter.release(retryable)
+            raise
+        except BaseException:
+            self.breaker.abandon(trial)
+            await self.limiter.release(False)
+            raise
+
+        async def done(overloaded: bool):
+            self.breaker.record(success=not overloaded)
+            await self.limiter.release(overloaded)
+
+        return stream, done
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "waiting": self.limiter.waiting,
+            "coalescing": len(self._in_flight),
+            "breaker_state": self.breaker.state,
+        }
+
+
+def governor_from_env() -> Governor:
+    return Governor(
+        initial_concurrency=float(os.getenv("MISTRAL_INITIAL_CONCURRENCY", 8)),
+        min_concurrency=float(os.getenv("MISTRAL_MIN_CONCURRENCY", 1)),
+        max_concurrency=float(os.getenv("MISTRAL_MAX_CONCURRENCY", 32)),
+        max_retries=int(os.getenv("MISTRAL_MAX_RETRIES", 3)),
+        backoff_base=float(os.getenv("MISTRAL_BACKOFF_BASE", 0.5)),
+        max_retry_after=float(os.getenv("MISTRAL_MAX_RETRY_AFTER", 30)),
+        breaker_threshold=int(os.getenv("MISTRAL_BREAKER_THRESHOLD", 5)),
+        breaker_reset=float(os.getenv("MISTRAL_BREAKER_RESET", 30)),
+    )
@@ -0,0 +1,26 @@
+"""
+Shared async HTTP client so every outbound request reuses one connection pool
+"""
+
+import httpx
+
+_client = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -2,11 +2,23 @@
 Job Matcher - Scrapes real LinkedIn jobs and matches against resume
 """
 
-import requests
-from bs4 import BeautifulSoup
+import logging
+import os
 import urllib.parse
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from .dedup import JOB_DEDUP, DuplicateIndex, dedupe_jobs
+from .embeddings import embed_text, job_similarities
+from .metrics import timed
+from .parsing import parse_job_cards
+from .skills import extract_skill_ids, skill_names
+from .scoring import JobMatrix, top_k as select_top_k
+from .scheduler import LinkedInSource, scrape_jobs, stream_jobs
+
+logger = logging.getLogger(__name__)
 
 # Fallback mock jobs if scraping fails
 MOCK_JOBS = [
@@ -94,197 +106,275 @@ MOCK_JOBS = [
 
 
 def extract_skills_from_resume(resume_text: str) -> List[str]:
-    """Extract skills from resume text - simplified version"""
-    skills_keywords = [
-        "Python", "Java", "JavaScript", "TypeScript", "React", "Node.js", "FastAPI", "Django",
-        "Flask", "Spring Boot", "Docker", "Kubernetes", "AWS", "Azure", "GCP", "PostgreSQL",
-        "MySQL", "MongoDB", "Redis", "Kafka", "RabbitMQ", "Microservices", "REST APIs",
-        "GraphQL", "CI/CD", "Terraform", "Ansible", "Linux", "Git", "Agile", "Scrum",
-        "Machine Learning", "TensorFlow", "PyTorch", "Spark", "Airflow", "ETL", "SQL",
-        "NoSQL", "Elasticsearch", "Prometheus", "Grafana", "Jenkins", "GitHub Actions"
-    ]
-    
-    resume_upper = resume_text.upper()
-    found_skills = []
-    
-    for skill in skills_keywords:
-        if skill.upper() in resume_upper:
-            found_skills.append(skill)
-    
-    return found_skills
+    """Extract catalog skills (canonical names, aliases resolved) from resume text"""
+    return skill_names(extract_skill_ids(resume_text))
 
 
 def calculate_match_score(resume_skills: List[str], job_skills: List[str]) -> int:
     """Calculate match percentage between resume and job requirements"""
     if not job_skills:
         return 50
-    
-    resume_skills_upper = [s.upper() for s in resume_skills]
+
+    resume_skills_upper = {s.upper() for s in resume_skills}
     matching = sum(1 for skill in job_skills if skill.upper() in resume_skills_upper)
-    
+
     score = int((matching / len(job_skills)) * 100)
     return min(score, 100)
 
 
+# Headers to mimic a browser
+LINKEDIN_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+}
+
+
+def build_linkedin_search_url(job_query: str, location: str = "") -> str:
+    """LinkedIn job search URL for a query and optional location"""
+    # Clean and encode search parameters
+    keywords = urllib.parse.quote(job_query)
+    location_param = urllib.parse.quote(location) if location else ""
+
+    base_url = f"https://www.linkedin.com/jobs/search?keywords={keywords}"
+    if location_param:
+        base_url += f"&location={location_param}"
+    base_url += "&position=1&pageNum=0"
+    return base_url
+
+
+def parse_linkedin_jobs(html, max_results: int = 15) -> List[Dict]:
+    """Parse job cards out of a LinkedIn search results page"""
+    jobs = []
+
+    for card in parse_job_cards(html, max_results):
+        title = card.get("title") or "Unknown Title"
+        company = card.get("company") or "Unknown Company"
+        job_location = card.get("location") or "Not specified"
+        job_url = card.get("url") or ""
+
+        # Make sure URL is absolute
+        if job_url and not job_url.startswith('http'):
+            job_url = 'https://www.linkedin.com' + job_url
+
+        description = card.get("description") or title
+
+        # Only add if we have at least title and company
+        if title != "Unknown Title" and company != "Unknown Company":
+            jobs.append({
+                "title": title,
+                "company": company,
+                "location": job_location,
+                "description": description,
+                "url": job_url,
+                "required_skills": extract_skills_from_resume(description)  # Extract skills from description
+            })
+
+    return jobs
+
+
 def scrape_linkedin_jobs(job_query: str, location: str = "", max_results: int = 15) -> List[Dict]:
     """
     Scrape real LinkedIn jobs based on search query
     Returns list of job dictionaries
     """
-    jobs = []
-    
+    import requests  # only the sync path needs it
+
     try:
-        # Clean and encode search parameters
-        keywords = urllib.parse.quote(job_query)
-        location_param = urllib.parse.quote(location) if location else ""
-        
-        # LinkedIn job search URL
-        base_url = f"https://www.linkedin.com/jobs/search?keywords={keywords}"
-        if location_param:
-            base_url += f"&location={location_param}"
-        base_url += "&position=1&pageNum=0"
-        
-        # Headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-        }
-        
         # Fetch the page
-        response = requests.get(base_url, headers=headers, timeout=10)
+        with timed("page_fetch"):
+            response = requests.get(build_linkedin_search_url(job_query, location), headers=LINKEDIN_HEADERS, timeout=10)
         response.raise_for_status()
-        
-        # Parse with BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find job cards
-        job_cards = soup.find_all('div', class_='base-card', limit=max_results)
-        
-        if not job_cards:
-            # Try alternative selectors
-            job_cards = soup.find_all('li', limit=max_results)
-        
-        for card in job_cards[:max_results]:
-            try:
-                # Extract job title
-                title_elem = card.find('h3', class_='base-search-card__title')
-                if not title_elem:
-                    title_elem = card.find('a', class_='base-card__full-link')
-                title = title_elem.get_text(strip=True) if title_elem else "Unknown Title"
-                
-                # Extract company name
-                company_elem = card.find('h4', class_='base-search-card__subtitle')
-                if not company_elem:
-                    company_elem = card.find('a', class_='hidden-nested-link')
-                company = company_elem.get_text(strip=True) if company_elem else "Unknown Company"
-                
-                # Extract location
-                location_elem = card.find('span', class_='job-search-card__location')
-                job_location = location_elem.get_text(strip=True) if location_elem else "Not specified"
-                
-                # Extract job URL
-                link_elem = card.find('a', class_='base-card__full-link')
-                if not link_elem:
-                    link_elem = card.find('a', href=True)
-                job_url = link_elem.get('href', '') if link_elem else ""
-                
-                # Make sure URL is absolute
-                if job_url and isinstance(job_url, str) and not job_url.startswith('http'):
-                    job_url = 'https://www.linkedin.com' + job_url
-                
-                # Extract snippet/description
-                snippet_elem = card.find('p', class_='base-search-card__snippet')
-                description = snippet_elem.get_text(strip=True) if snippet_elem else title
-                
-                # Only add if we have at least title and company
-                if title != "Unknown Title" and company != "Unknown Company":
-                    jobs.append({
-                        "title": title,
-                        "company": company,
-                        "location": job_location,
-                        "description": description,
-                        "url": job_url,
-                        "required_skills": extract_skills_from_resume(description)  # Extract skills from description
-                    })
-                    
-            except Exception as e:
-                # Skip this job if parsing fails
-                continue
-        
+
+        jobs = parse_linkedin_jobs(response.content, max_results)
+
         # Add small delay to be respectful
         time.sleep(0.5)
-        
+
     except Exception as e:
-        print(f"LinkedIn scraping error: {str(e)}")
+        logger.warning(f"LinkedIn scraping error: {str(e)}")
         # Return empty list, will fall back to mock data
         return []
-    
+
     return jobs
 
 
-def find_matching_jobs(resume_text: str, job_query: str, location: str = "", min_score: int = 60) -> List[Dict]:
+async def scrape_linkedin_jobs_async(job_query: str, location: str = "", max_results: int = 15) -> List[Dict]:
+    """Async variant of scrape_linkedin_jobs; pages are fetched concurrently by the scheduler"""
+    return await scrape_jobs(job_query, location, max_results, sources=[LinkedInSource()])
+
+
+# Semantic mode: share of the score from embedding similarity (the rest is keyword overlap)
+SEMANTIC_WEIGHT = float(os.getenv("SEMANTIC_WEIGHT", 0.6))
+# Cosine similarity that counts as a 100% semantic match
+SEMANTIC_FULL_MATCH = float(os.getenv("SEMANTIC_FULL_MATCH", 0.5))
+# Weight of the search query relative to the resume in the semantic query vector
+SEMANTIC_QUERY_WEIGHT = 3.0
+
+
+def semantic_query(resume_text: str, job_query: str, resume_vector: Optional[np.ndarray] = None) -> np.ndarray:
+    """Raw query embedding: the resume (or its stored vector) steered towards the search query"""
+    if resume_vector is None:
+        resume_vector = embed_text(resume_text)
+    return resume_vector + SEMANTIC_QUERY_WEIGHT * embed_text(job_query)
+
+
+def semantic_scores(similarities: np.ndarray) -> np.ndarray:
+    """Cosine similarities as 0-100 semantic match percentages"""
+    return np.clip(similarities / SEMANTIC_FULL_MATCH, 0, 1) * 100
+
+
+def blend_scores(keyword: np.ndarray, semantic: np.ndarray, skill_counts: np.ndarray) -> np.ndarray:
+    """Semantic-mode scores; jobs without known skills (skill_counts 0) use the semantic score alone"""
+    blended = SEMANTIC_WEIGHT * semantic + (1 - SEMANTIC_WEIGHT) * keyword
+    return np.rint(np.where(skill_counts == 0, semantic, blended))
+
+
+def score_jobs(resume_text: str, jobs: List[Dict], job_query: str, location: str = "", min_score: int = 60,
+               top_k: Optional[int] = None, resume_skill_ids: Optional[List[int]] = None,
+               mode: str = "keyword", query_vector: Optional[np.ndarray] = None,
+               query_matched: bool = False) -> List[Dict]:
     """
-    Find jobs matching the resume by scraping LinkedIn
-    Falls back to mock data if scraping fails
+    Filter jobs by query/location and score them against the resume (or its precomputed skill IDs).
+    query_matched=True skips the query substring filter for jobs already matched to the
+    query, e.g. full-text search hits, which match tokens rather than the exact string.
+    In semantic mode the query does not filter; scores blend embedding similarity to
+    query_vector with keyword overlap, and jobs without known skills use similarity alone.
     """
     # Extract skills from resume
-    resume_skills = extract_skills_from_resume(resume_text)
-    
-    # Try to scrape real LinkedIn jobs first
-    print(f"Attempting to scrape LinkedIn jobs for: {job_query}")
-    linkedin_jobs = scrape_linkedin_jobs(job_query, location, max_results=15)
-    
-    # Use LinkedIn jobs if we got any, otherwise fall back to mock data
-    if linkedin_jobs:
-        print(f"Successfully scraped {len(linkedin_jobs)} jobs from LinkedIn")
-        jobs_to_process = linkedin_jobs
-        source = "LinkedIn"
-    else:
-        print("Falling back to mock job data")
-        jobs_to_process = MOCK_JOBS
-        source = "Mock"
-    
-    # Filter and score jobs
-    filtered_jobs = []
+    if resume_skill_ids is None:
+        resume_skill_ids = extract_skill_ids(resume_text)
+    resume_skills_upper = {s.upper() for s in skill_names(resume_skill_ids)}
+
     query_lower = job_query.lower()
     location_lower = location.lower() if location else ""
-    
-    for job in jobs_to_process:
+
+    candidates = []
+    for job in jobs:
         # Check if job matches search query
-        if query_lower not in job["title"].lower() and query_lower not in job["description"].lower():
+        if mode == "keyword" and not query_matched and query_lower not in job["title"].lower() \
+                and query_lower not in job["description"].lower():
             continue
-        
+
         # Check location if specified
         if location_lower and location_lower != "remote":
             if location_lower not in job["location"].lower():
                 continue
-        
-        # Calculate match score
-        score = calculate_match_score(resume_skills, job["required_skills"])
-        
-        # Filter by minimum score
-        if score < min_score:
-            continue
-        
+
+        candidates.append(job)
+
+    if not candidates:
+        return []
+
+    # Score every candidate in one matrix operation, then keep the best
+    with timed("job_scoring"):
+        matrix = JobMatrix(candidates)
+        scores = matrix.score(resume_skill_ids)
+        semantic = None
+        if mode == "semantic":
+            if query_vector is None:
+                query_vector = semantic_query(resume_text, job_query)
+            semantic = semantic_scores(job_similarities(query_vector, candidates))
+            scores = blend_scores(scores, semantic, matrix.skill_counts)
+        best = select_top_k(scores, top_k, min_score)
+
+    filtered_jobs = []
+    for index in best:
+        job = candidates[index]
         # Find matching and missing skills
-        resume_skills_upper = [s.upper() for s in resume_skills]
         matching_skills = [s for s in job["required_skills"] if s.upper() in resume_skills_upper]
         missing_skills = [s for s in job["required_skills"] if s.upper() not in resume_skills_upper]
-        
-        filtered_jobs.append({
+
+        result = {
             "title": job["title"],
             "company": job["company"],
             "location": job["location"],
             "description": job["description"],
             "url": job["url"],
-            "score": score,
+            # The canonical's own list, so duplicates found in later pages still show up
+            "alternate_urls": job.get("alternate_urls", []),
+            "score": int(scores[index]),
             "matching_skills": matching_skills,
             "missing_skills": missing_skills
-        })
-    
-    # Sort by score descending
-    filtered_jobs.sort(key=lambda x: x["score"], reverse=True)
-    
+        }
+        if semantic is not None:
+            result["semantic_score"] = int(round(semantic[index]))
+        filtered_jobs.append(result)
+
     return filtered_jobs
+
+
+def _jobs_or_mock(linkedin_jobs: List[Dict]) -> List[Dict]:
+    # Use LinkedIn jobs if we got any, otherwise fall back to mock data
+    if linkedin_jobs:
+        logger.info(f"Successfully scraped {len(linkedin_jobs)} jobs from LinkedIn")
+        return linkedin_jobs
+    logger.warning("Falling back to mock job data")
+    return MOCK_JOBS
+
+
+def find_matching_jobs(resume_text: str, job_query: str, location: str = "", min_score: int = 60,
+                       corpus: Optional[List[Dict]] = None, max_results: int = 15,
+                       resume_skill_ids: Optional[List[int]] = None,
+                       mode: str = "keyword", query_vector: Optional[np.ndarray] = None) -> List[Dict]:
+    """
+    Find jobs matching the resume.
+    Uses the given corpus (postings already matched to the query, e.g. full-text hits
+    from the local job store) when it is non-empty, otherwise scrapes LinkedIn and
+    falls back to mock data if scraping fails.
+    resume_skill_ids (e.g. from a stored resume profile) skips skill extraction.
+    mode="semantic" blends embedding similarity into the scores (see score_jobs).
+    Near-duplicate postings are scored once, with the other URLs in alternate_urls.
+    Returns at most max_results jobs, best first.
+    """
+    if resume_skill_ids is None:
+        resume_skill_ids = extract_skill_ids(resume_text)
+    if mode == "semantic" and query_vector is None:
+        query_vector = semantic_query(resume_text, job_query)
+    options = dict(top_k=max_results, resume_skill_ids=resume_skill_ids, mode=mode, query_vector=query_vector)
+
+    if corpus:
+        return score_jobs(resume_text, dedupe_jobs(corpus), job_query, location, min_score, query_matched=True,
+                          **options)
+
+    # Try to scrape real LinkedIn jobs first
+    logger.info(f"Attempting to scrape LinkedIn jobs for: {job_query}")
+    jobs = dedupe_jobs(_jobs_or_mock(scrape_linkedin_jobs(job_query, location, max_results)))
+
+    return score_jobs(resume_text, jobs, job_query, location, min_score, **options)
+
+
+async def find_matching_jobs_async(resume_text: str, job_query: str, location: str = "", min_score: int = 60,
+                                   corpus: Optional[List[Dict]] = None, max_results: int = 15,
+                                   resume_skill_ids: Optional[List[int]] = None,
+                                   mode: str = "keyword", query_vector: Optional[np.ndarray] = None) -> List[Dict]:
+    """Async variant of find_matching_jobs; scores each scraped page as it arrives and keeps the best"""
+    if resume_skill_ids is None:
+        resume_skill_ids = extract_skill_ids(resume_text)
+    if mode == "semantic" and query_vector is None:
+        query_vector = semantic_query(resume_text, job_query)
+    options = dict(top_k=max_results, resume_skill_ids=resume_skill_ids, mode=mode, query_vector=query_vector)
+
+    if corpus:
+        return score_jobs(resume_text, dedupe_jobs(corpus), job_query, location, min_score, query_matched=True,
+                          **options)
+
+    logger.info(f"Attempting to scrape jobs for: {job_query}")
+    scraped = 0
+    filtered_jobs = []
+    # Shared across pages: a repost in a later page is attached to the posting already scored
+    seen = DuplicateIndex()
+    async for page in stream_jobs(job_query, location, max_results):
+        scraped += len(page)
+        if JOB_DEDUP:
+            with timed("job_dedup"):
+                page = [job for job, new in map(seen.add, page) if new]
+        filtered_jobs.extend(score_jobs(resume_text, page, job_query, location, min_score, **options))
+
+    if not scraped:
+        return score_jobs(resume_text, dedupe_jobs(_jobs_or_mock([])), job_query, location, min_score, **options)
+
+    logger.info(f"Successfully scraped {scraped} jobs")
+    filtered_jobs.sort(key=lambda x: x["score"], reverse=True)
+    return filtered_jobs[:max_results]
@@ -0,0 +1,305 @@
+"""
+In-process metrics: latency histograms, counters and gauges rendered in the
+Prometheus text format, plus a request-scoped trace ID for log records
+"""
+
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; spans in-memory cache lookups up to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (metric name, type, help, labels, value) produced by collectors at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self._lines()
+
+    @abstractmethod
+    def _lines(self) -> List[str]:
+        """Sample lines, without the HELP and TYPE header"""
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _lines(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. work in flight"""
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations per label set"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def label_sets(self) -> List[Dict[str, str]]:
+        with self._lock:
+            keys = sorted(self._series)
+        return [dict(zip(self.labels, key)) for key in keys]
+
+    def quantile(self, q: float, **labels) -> float:
+        """Estimate of the q-quantile, interpolated within its bucket like PromQL's histogram_quantile"""
+        series = self._series.get(self._key(labels))
+        if not series or not series[2]:
+            return float("nan")
+        rank = q * series[2]
+        cumulative, lower = 0, 0.0
+        for bound, bucket_count in zip(self.buckets, series[0]):
+            if cumulative + bucket_count >= rank and bucket_count:
+                return lower + (bound - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = bound
+        # Beyond the largest finite bucket
+        return self.buckets[-1]
+
+    def _lines(self):
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Metrics owned by this process plus collectors that report other components' state when scraped"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[Sample]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def register_collector(self, name: str, collect: Callable[[], Iterable[Sample]]):
+        """Add (or replace) a callback returning Samples at scrape time"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collect in collectors:
+            for name, kind, help, labels, value in collect():
+                family = families.setdefault(name, (kind, help, []))
+                family[2].append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        for name, (kind, help, samples) in families.items():
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}"] + samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "stage_duration_seconds", "Time spent in one pipeline stage (fetch, parse, LLM call, ...)", ["stage"]
+)
+STAGE_ERRORS = registry.counter("stage_errors_total", "Pipeline stages that raised", ["stage"])
+STAGE_IN_FLIGHT = registry.gauge("stage_in_flight", "Pipeline stages currently running", ["stage"])
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to response headers per route", ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests being handled")
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of the enclosed block under stage, and count it as in flight meanwhile"""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+
+def observe(stage: str, seconds: float):
+    """Record a stage duration measured by the caller (e.g. across a stream)"""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def cache_samples(name: str, stats: Dict[str, int]) -> List[Sample]:
+    """Samples for a TieredCache.stats() dict"""
+    labels = {"cache": name}
+    samples = [
+        ("cache_events_total", "counter", "Cache lookups by outcome (hits, misses, stale, revalidated)",
+         {**labels, "event": event}, value)
+        for event, value in stats.items() if event not in ("entries", "bytes")
+    ]
+    samples.append(("cache_entries", "gauge", "Entries in a cache's memory tier", labels, stats.get("entries", 0)))
+    samples.append(("cache_bytes", "gauge", "Bytes held by a cache's memory tier", labels, stats.get("bytes", 0)))
+    return samples
+
+
+def governor_samples(snapshot: Dict) -> List[Sample]:
+    """Samples for a Governor.snapshot() dict"""
+    samples = [
+        ("mistral_calls_total", "counter", "Mistral governor outcomes (calls, coalesced, retries, failures, rejected)",
+         {"outcome": key}, snapshot[key])
+        for key in ("calls", "coalesced", "retries", "failures", "rejected") if key in snapshot
+    ]
+    for key, help in (("concurrency_limit", "Current adaptive limit on concurrent Mistral calls"),
+                      ("in_flight", "Mistral calls in flight"),
+                      ("waiting", "Mistral calls waiting for a concurrency slot"),
+                      ("coalescing", "Distinct prompts in flight that other callers share")):
+        if key in snapshot:
+            samples.append((f"mistral_{key}", "gauge", help, {}, snapshot[key]))
+    for state in ("closed", "open", "half_open"):
+        samples.append(("mistral_breaker_state", "gauge", "1 for the circuit breaker's current state",
+                        {"state": state}, int(snapshot.get("breaker_state") == state)))
+    return samples
+
+
+# ================================
+# Trace IDs
+# ================================
+
+trace_id_var: contextvars.ContextVar = contextvars.ContextVar("trace_id", default="-")
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def set_trace_id(trace_id: Optional[str] = None) -> str:
+    """Tag log records from the current context (request, task) with trace_id; returns it"""
+    trace_id = trace_id or new_trace_id()
+    trace_id_var.set(trace_id)
+    return trace_id
+
+
+def get_trace_id() -> str:
+    return trace_id_var.get()
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds %(trace_id)s to log records; asyncio tasks and to_thread calls inherit it"""
+
+    def filter(self, record):
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+def install_trace_id_filter(logger: Optional[logging.Logger] = None):
+    """Attach TraceIdFilter to the handlers of logger (default: the root logger)"""
+    for handler in (logger or logging.getLogger()).handlers:
+        if not any(isinstance(f, TraceIdFilter) for f in handler.filters):
+            handler.addFilter(TraceIdFilter())
@@ -6,3 +6,20 @@ class ResumeScore(BaseModel):
     score: int
     missing_skills: List[str]
     suggestions: List[str]
+
+
+class JobScore(ResumeScore):
+    jd: int
+
+
+class BatchResumeScores(BaseModel):
+    scores: List[JobScore]
+
+
+class QuestionAnswer(BaseModel):
+    question: int
+    answer: str
+
+
+class TailoredAnswers(BaseModel):
+    answers: List[QuestionAnswer]
@@ -0,0 +1,135 @@
+"""
+HTML parser backends. Uses the fastest parser installed: selectolax (lexbor) for
+job cards, lxml under BeautifulSoup for job pages, and the pure-Python
+html.parser with a SoupStrainer as the fallback. HTML_PARSER forces a backend.
+"""
+
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # selectolax is optional
+    SelectolaxParser = None
+
+try:
+    import lxml  # noqa: F401  (only needed as a BeautifulSoup tree builder)
+    HAS_LXML = True
+except ImportError:  # lxml is optional
+    HAS_LXML = False
+
+
+def _detect_backend() -> str:
+    forced = os.getenv("HTML_PARSER", "auto")
+    if forced != "auto":
+        return forced
+    if SelectolaxParser is not None:
+        return "selectolax"
+    if HAS_LXML:
+        return "lxml"
+    return "html.parser"
+
+
+PARSER_BACKEND = _detect_backend()
+
+# Job card field -> (tag, class) rules in order of preference; a class of None matches any <a href>
+CARD_FIELD_RULES = {
+    "title": [("h3", "base-search-card__title"), ("a", "base-card__full-link")],
+    "company": [("h4", "base-search-card__subtitle"), ("a", "hidden-nested-link")],
+    "location": [("span", "job-search-card__location")],
+    "url": [("a", "base-card__full-link"), ("a", None)],
+    "description": [("p", "base-search-card__snippet")],
+}
+
+# All field rules as one selector (and one tag list for BeautifulSoup), so each card is walked once
+CARD_FIELDS_SELECTOR = ", ".join(dict.fromkeys(
+    f"{tag}.{cls}" if cls else f"{tag}[href]"
+    for rules in CARD_FIELD_RULES.values() for tag, cls in rules
+))
+CARD_FIELD_TAGS = list(dict.fromkeys(tag for rules in CARD_FIELD_RULES.values() for tag, _ in rules))
+
+
+def _bs4_features(backend: str) -> str:
+    return "lxml" if backend in ("lxml", "selectolax") and HAS_LXML else "html.parser"
+
+
+def parse_document(html, backend: Optional[str] = None) -> "BeautifulSoup":
+    """Parse a whole page into BeautifulSoup with the fastest tree builder available"""
+    # Imported on first use; job searches on selectolax never need it
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, _bs4_features(backend or PARSER_BACKEND))
+
+
+def _assign_fields(matches) -> Dict[str, str]:
+    """Pick each field from (tag, classes, href, element, get_text) matches by rule preference"""
+    fields, ranks = {}, {}
+    for tag, classes, href, element, get_text in matches:
+        for field, rules in CARD_FIELD_RULES.items():
+            for rank, (rule_tag, rule_class) in enumerate(rules):
+                if rank >= ranks.get(field, len(rules)) or tag != rule_tag:
+                    continue
+                if (rule_class is None and not href) or (rule_class is not None and rule_class not in classes):
+                    continue
+                fields[field] = href if field == "url" else get_text(element)
+                ranks[field] = rank
+                break
+    return fields
+
+
+def _selectolax_text(node) -> str:
+    return node.text(strip=True)
+
+
+def _bs4_text(element) -> str:
+    return element.get_text(strip=True)
+
+
+def _selectolax_cards(html, max_results: int) -> List[Dict[str, str]]:
+    tree = SelectolaxParser(html)
+    cards = tree.css("div.base-card") or tree.css("li")
+    return [
+        _assign_fields(
+            (node.tag, (node.attributes.get("class") or "").split(), node.attributes.get("href"), node, _selectolax_text)
+            for node in card.css(CARD_FIELDS_SELECTOR)
+        )
+        for card in cards[:max_results]
+    ]
+
+
+def _is_base_card(value) -> bool:
+    # The strainer sees the raw class attribute, before BeautifulSoup splits it into a list
+    if not value:
+        return False
+    return "base-card" in (value.split() if isinstance(value, str) else value)
+
+
+def _bs4_cards(html, max_results: int, backend: str) -> List[Dict[str, str]]:
+    from bs4 import BeautifulSoup, SoupStrainer
+    features = _bs4_features(backend)
+    # Build only the card subtrees instead of the whole page
+    soup = BeautifulSoup(html, features, parse_only=SoupStrainer("div", class_=_is_base_card))
+    cards = soup.find_all("div", class_="base-card", limit=max_results)
+    if not cards:
+        soup = BeautifulSoup(html, features, parse_only=SoupStrainer("li"))
+        cards = soup.find_all("li", limit=max_results)
+    return [
+        _assign_fields(
+            (el.name, el.get("class") or [], el.get("href"), el, _bs4_text)
+            for el in card.find_all(CARD_FIELD_TAGS)
+        )
+        for card in cards
+    ]
+
+
+def parse_job_cards(html, max_results: int = 15, backend: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Raw fields (title, company, location, url, description) of the job cards on a
+    search results page, each present only if found in the card
+    """
+    backend = backend or PARSER_BACKEND
+    if backend == "selectolax" and SelectolaxParser is not None:
+        return _selectolax_cards(html, max_results)
+    return _bs4_cards(html, max_results, backend)
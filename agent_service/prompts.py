@@ -36,4 +36,56 @@ Write a concise, professional answer (2-3 paragraphs maximum) that:
 - Shows alignment with the job requirements
 - Uses confident, professional language
 
-Answer:"""
\ No newline at end of file
+Answer:"""
+
+batch_resume_score_prompt = """
+You are an expert AI career coach.
+
+Compare the Resume against each numbered Job Description and return ONLY valid JSON
+with one entry per job description, in the same order.
+
+Resume:
+{resume}
+
+{jds}
+
+Return STRICT JSON format (no markdown, no extra text):
+{{
+ "scores": [
+  {{
+   "jd": 1,
+   "score": 75,
+   "missing_skills": ["Docker", "Kubernetes"],
+   "suggestions": ["Add Docker containerization experience", "Highlight any cloud platform experience"]
+  }}
+ ]
+}}
+
+Your response:"""
+
+batch_tailored_answer_prompt = """
+You are a professional career advisor helping a candidate write compelling application answers.
+
+User Profile:
+{profile}
+
+Job Description:
+{jd}
+
+Application Questions:
+{questions}
+
+For each numbered question, write a concise, professional answer (2-3 paragraphs maximum) that:
+- Directly addresses the question
+- Highlights relevant experience from the profile
+- Shows alignment with the job requirements
+- Uses confident, professional language
+
+Return STRICT JSON format (no markdown, no extra text) with one entry per question, in order:
+{{
+ "answers": [
+  {{"question": 1, "answer": "..."}}
+ ]
+}}
+
+Your response:"""
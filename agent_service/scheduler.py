@@ -0,0 +1,249 @@
+"""
+Scraping scheduler - concurrent page fetches across job sources with
+per-host token-bucket rate limiting and retries with backoff
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from .http_client import get_async_client
+from .metrics import timed
+from .skills import extract_skill_ids, skill_names
+
+RATE_PER_HOST = float(os.getenv("SCRAPE_RATE_PER_HOST", 2.0))
+BURST_PER_HOST = int(os.getenv("SCRAPE_BURST_PER_HOST", 4))
+MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", 8))
+MAX_RETRIES = int(os.getenv("SCRAPE_MAX_RETRIES", 3))
+BACKOFF_BASE = float(os.getenv("SCRAPE_BACKOFF_BASE", 0.5))
+# Longest Retry-After honoured; a host asking for a longer wait has the page given up
+MAX_RETRY_AFTER = float(os.getenv("SCRAPE_MAX_RETRY_AFTER", 10))
+JOB_SOURCES = [s.strip() for s in os.getenv("JOB_SOURCES", "linkedin").split(",") if s.strip()]
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average with bursts of up to `capacity`.
+    Guarded by a thread lock so request handlers and the ingestion thread share one budget per host.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def _bucket_for(url: str) -> TokenBucket:
+    host = urllib.parse.urlsplit(url).netloc
+    return _buckets.setdefault(host, TokenBucket(RATE_PER_HOST, BURST_PER_HOST))
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    if response is not None and response.headers.get("Retry-After", "").isdigit():
+        return float(response.headers["Retry-After"])
+    # Exponential backoff with full jitter
+    return random.uniform(0, BACKOFF_BASE * (2 ** attempt))
+
+
+async def fetch(url: str, headers: Optional[Dict] = None, client: Optional[httpx.AsyncClient] = None) -> httpx.Response:
+    """GET a URL under its host's rate limit, retrying transient failures"""
+    client = client or get_async_client()
+    bucket = _bucket_for(url)
+
+    for attempt in range(MAX_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            delay = _retry_delay(attempt, response)
+            # Waiting longer would stall the search while holding a fetch slot
+            if delay <= MAX_RETRY_AFTER:
+                await asyncio.sleep(delay)
+                continue
+        response.raise_for_status()
+        return response
+
+
+# ================================
+# Job source adapters
+# ================================
+
+class JobSource(ABC):
+    """A job board: which pages to fetch for a search and how to parse them into job dicts"""
+
+    name = ""
+    page_size = 25
+    headers: Dict = {}
+
+    @abstractmethod
+    def page_urls(self, job_query: str, location: str, max_results: int) -> List[str]:
+        """URLs of the result pages to fetch for a search"""
+
+    @abstractmethod
+    def parse(self, response: httpx.Response) -> List[Dict]:
+        """Job dicts from one fetched page"""
+
+
+class LinkedInSource(JobSource):
+    """LinkedIn's public job search; the guest endpoint pages through results 25 cards at a time"""
+
+    name = "LinkedIn"
+    base_url = os.getenv("LINKEDIN_BASE_URL", "https://www.linkedin.com")
+
+    def __init__(self):
+        from .job_matcher import LINKEDIN_HEADERS
+        self.headers = LINKEDIN_HEADERS
+
+    def page_urls(self, job_query, location, max_results):
+        pages = max(1, -(-max_results // self.page_size))
+        params = {"keywords": job_query}
+        if location:
+            params["location"] = location
+        return [
+            f"{self.base_url}/jobs-guest/jobs/api/seeMoreJobPostings/search?"
+            + urllib.parse.urlencode({**params, "start": page * self.page_size})
+            for page in range(pages)
+        ]
+
+    def parse(self, response):
+        from .job_matcher import parse_linkedin_jobs
+        return parse_linkedin_jobs(response.content, self.page_size)
+
+
+class RemotiveSource(JobSource):
+    """Remotive's public remote-jobs JSON API (one response per search)"""
+
+    name = "Remotive"
+    base_url = os.getenv("REMOTIVE_BASE_URL", "https://remotive.com")
+
+    def page_urls(self, job_query, location, max_results):
+        params = urllib.parse.urlencode({"search": job_query, "limit": max_results})
+        return [f"{self.base_url}/api/remote-jobs?{params}"]
+
+    def parse(self, response):
+        from .scraper import clean_job_description
+        jobs = []
+        for item in response.json().get("jobs", []):
+            try:
+                description = clean_job_description(item.get("description", ""))
+            except ValueError:
+                description = item.get("title", "")
+            jobs.append({
+                "title": item.get("title", "Unknown Title"),
+                "company": item.get("company_name", "Unknown Company"),
+                "location": item.get("candidate_required_location") or "Remote",
+                "description": description,
+                "url": item.get("url", ""),
+                "required_skills": skill_names(extract_skill_ids(description)),
+            })
+        return jobs
+
+
+SOURCES = {
+    "linkedin": LinkedInSource,
+    "remotive": RemotiveSource,
+}
+
+
+def get_sources(names: Optional[List[str]] = None) -> List[JobSource]:
+    return [SOURCES[name]() for name in (names or JOB_SOURCES) if name in SOURCES]
+
+
+async def stream_jobs(job_query: str, location: str = "", max_results: int = 15,
+                      sources: Optional[List[JobSource]] = None,
+                      client: Optional[httpx.AsyncClient] = None) -> AsyncIterator[List[Dict]]:
+    """
+    Fetch every page of every source concurrently and yield each page's jobs
+    as soon as it is parsed. Jobs are deduplicated by URL, or by title, company
+    and location when a card has no URL; stops at max_results.
+    """
+    sources = sources if sources is not None else get_sources()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def fetch_page(source: JobSource, url: str) -> List[Dict]:
+        async with semaphore:
+            try:
+                with timed("page_fetch"):
+                    response = await fetch(url, source.headers, client)
+            except httpx.HTTPError as e:
+                logger.warning(f"{source.name} scraping error: {str(e)}")
+                return []
+        try:
+            # Parsing is CPU-bound; keep it off the event loop
+            with timed("page_parse"):
+                return await asyncio.to_thread(source.parse, response)
+        except Exception as e:
+            logger.warning(f"{source.name} parsing error: {str(e)}")
+            return []
+
+    tasks = [
+        asyncio.ensure_future(fetch_page(source, url))
+        for source in sources
+        for url in source.page_urls(job_query, location, max_results)
+    ]
+
+    seen = set()
+    remaining = max_results
+    try:
+        for next_page in asyncio.as_completed(tasks):
+            page = []
+            for job in await next_page:
+                key = job["url"] or (job["title"], job["company"], job["location"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                page.append(job)
+            page = page[:remaining]
+            if page:
+                remaining -= len(page)
+                yield page
+            if remaining <= 0:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def scrape_jobs(job_query: str, location: str = "", max_results: int = 15,
+                      sources: Optional[List[JobSource]] = None,
+                      client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
+    """Collect stream_jobs into a single list"""
+    jobs = []
+    async for page in stream_jobs(job_query, location, max_results, sources, client):
+        jobs.extend(page)
+    return jobs
@@ -0,0 +1,92 @@
+"""
+Batch scoring engine - skills as integer IDs, jobs as a boolean matrix
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .skills import SKILL_NAMES, skill_id
+
+
+class SkillVocabulary:
+    """
+    Maps skill names to integer columns. Catalog skills keep their catalog ID;
+    any other name found in a job's required_skills gets the next free ID.
+    """
+
+    def __init__(self):
+        self._extra: Dict[str, int] = {}
+        self._names: List[str] = list(SKILL_NAMES)
+        self._lock = threading.Lock()
+
+    def intern(self, name: str) -> int:
+        sid = skill_id(name)
+        if sid is not None:
+            return sid
+        key = " ".join(name.split()).upper()
+        with self._lock:
+            if key not in self._extra:
+                self._extra[key] = len(self._names)
+                self._names.append(name)
+            return self._extra[key]
+
+    def ids(self, names: Iterable[str]) -> List[int]:
+        return sorted({self.intern(name) for name in names})
+
+    def __len__(self):
+        return len(self._names)
+
+
+vocabulary = SkillVocabulary()
+
+
+class JobMatrix:
+    """One row per job, one column per skill; scores whole corpora with a single matmul"""
+
+    def __init__(self, jobs: List[Dict]):
+        self.jobs = jobs
+        # Jobs loaded from the job store carry precomputed skill IDs
+        rows = [
+            job["skill_ids"] if "skill_ids" in job else vocabulary.ids(job["required_skills"])
+            for job in jobs
+        ]
+        self.width = len(vocabulary)
+
+        self.matrix = np.zeros((len(jobs), self.width), dtype=np.uint8)
+        row_index = np.repeat(np.arange(len(rows)), [len(ids) for ids in rows])
+        col_index = np.fromiter((i for ids in rows for i in ids), dtype=np.intp, count=len(row_index))
+        self.matrix[row_index, col_index] = 1
+        self.skill_counts = self.matrix.sum(axis=1, dtype=np.int32)
+
+    def _resume_vectors(self, resumes: List[List[int]]) -> np.ndarray:
+        vectors = np.zeros((len(resumes), self.width), dtype=np.int32)
+        for row, ids in enumerate(resumes):
+            vectors[row, [i for i in ids if i < self.width]] = 1
+        return vectors
+
+    def score_many(self, resumes: List[List[int]], start: int = 0) -> np.ndarray:
+        """(M resumes x jobs[start:]) match percentages; jobs without known skills score 50"""
+        skill_counts = self.skill_counts[start:]
+        matches = self._resume_vectors(resumes) @ self.matrix[start:].T
+        counts = np.maximum(skill_counts, 1)
+        scores = np.minimum(matches * 100 // counts, 100)
+        return np.where(skill_counts == 0, 50, scores)
+
+    def score(self, resume_ids: List[int]) -> np.ndarray:
+        """Match percentage of one resume against every job"""
+        return self.score_many([resume_ids])[0]
+
+
+def top_k(scores: np.ndarray, k: Optional[int] = None, min_score: int = 0) -> np.ndarray:
+    """Indices of the k best scores at or above min_score, best first"""
+    candidates = np.flatnonzero(scores >= min_score)
+    if k is not None and k < len(candidates):
+        # Everything above the k-th best score, then the earliest jobs tied with it
+        kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+        above = candidates[scores[candidates] > kth]
+        tied = candidates[scores[candidates] == kth][:k - len(above)]
+        candidates = np.sort(np.concatenate([above, tied]))
+    # Stable sort keeps the original job order among equal scores
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -1,30 +1,137 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import os
+import urllib.parse
+
+import httpx
+
+from .cache import CacheEntry, TieredCache, build_cache
+from .compaction import compact_job_description
+from .http_client import get_async_client
+from .metrics import timed
+from .parsing import parse_document
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Query parameters that only track the click and never change the posting
+TRACKING_PARAMS = {"trk", "trackingid", "refid", "ref", "source", "gclid", "fbclid", "gh_src", "lever-source"}
+
+jd_cache = build_cache(
+    "jd",
+    ttl=float(os.getenv("JD_CACHE_TTL", 6 * 60 * 60)),
+    max_entries=int(os.getenv("JD_CACHE_SIZE", 256)),
+    path=os.getenv("JD_CACHE_PATH"),
+    disk_max_bytes=int(os.getenv("JD_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)),
+)
+
+
+def set_jd_cache(cache: TieredCache):
+    """Swap the JD cache (e.g. a memory-only cache in tests)"""
+    global jd_cache
+    jd_cache = cache
+
+
+def normalize_url(url: str) -> str:
+    """Canonical cache key for a job posting URL."""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urllib.parse.urlunsplit((scheme, host, path, urllib.parse.urlencode(query), ""))
+
+
+def clean_job_description(html: str) -> str:
+    """Strip markup and noisy elements from a job page and compact it to its relevant sections."""
+    with timed("jd_parse"):
+        soup = parse_document(html)
+
+        # Remove noisy elements
+        for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+            tag.decompose()
+
+        text = soup.get_text(separator=" ")
+        clean = " ".join(text.split())
+
+        if len(clean) < 100:
+            raise ValueError(f"Scraped content too short ({len(clean)} chars). URL may be invalid.")
+
+        return compact_job_description(soup)
+
+
+def _revalidation_headers(cached: CacheEntry) -> dict:
+    """Request headers, with validators from an expired cache entry if there is one."""
+    headers = dict(HEADERS)
+    if cached is not None:
+        # Expired entry: ask the server whether the posting changed
+        if cached.value.get("etag"):
+            headers["If-None-Match"] = cached.value["etag"]
+        if cached.value.get("last_modified"):
+            headers["If-Modified-Since"] = cached.value["last_modified"]
+    return headers
+
+
+def _cache_value(text: str, response_headers) -> dict:
+    return {
+        "text": text,
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+    }
 
 
 def scrape_job_description(url: str) -> str:
     """Scrape job description from URL with error handling."""
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
+    import requests  # only the sync path needs it
+
+    key = normalize_url(url)
+    cached = jd_cache.lookup(key)
+    if cached is not None and cached.fresh:
+        return cached.value["text"]
 
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        with timed("jd_fetch"):
+            response = requests.get(url, headers=_revalidation_headers(cached), timeout=15)
         response.raise_for_status()  # Raise exception for bad status codes
     except requests.RequestException as e:
         raise ValueError(f"Failed to fetch job description from {url}: {e}")
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    if response.status_code == 304 and cached is not None:
+        jd_cache.record("revalidated")
+        jd_cache.set(key, cached.value)
+        return cached.value["text"]
+
+    text = clean_job_description(response.text)
+    jd_cache.set(key, _cache_value(text, response.headers))
+    return text
 
-    # Remove noisy elements
-    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-        tag.decompose()
 
-    text = soup.get_text(separator=" ")
-    clean = " ".join(text.split())
+async def scrape_job_description_async(url: str) -> str:
+    """Async variant of scrape_job_description using the shared connection pool."""
 
-    if len(clean) < 100:
-        raise ValueError(f"Scraped content too short ({len(clean)} chars). URL may be invalid.")
+    key = normalize_url(url)
+    cached = await jd_cache.lookup_async(key)
+    if cached is not None and cached.fresh:
+        return cached.value["text"]
+
+    try:
+        with timed("jd_fetch"):
+            response = await get_async_client().get(url, headers=_revalidation_headers(cached))
+        if response.status_code == 304 and cached is not None:
+            jd_cache.record("revalidated")
+            await jd_cache.set_async(key, cached.value)
+            return cached.value["text"]
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        raise ValueError(f"Failed to fetch job description from {url}: {e}")
 
-    return clean[:6000]
\ No newline at end of file
+    # Parsing is CPU-bound; keep it off the event loop
+    text = await asyncio.to_thread(clean_job_description, response.text)
+    await jd_cache.set_async(key, _cache_value(text, response.headers))
+    return text
@@ -0,0 +1,115 @@
+"""
+Skill catalog and a single compiled matcher that finds skills in one pass over text
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+from .metrics import timed
+
+# Canonical skill name -> aliases. A skill's ID is its position in this list.
+SKILL_CATALOG = [
+    ("Python", []),
+    ("Java", []),
+    ("JavaScript", ["JS", "ECMAScript"]),
+    ("TypeScript", []),
+    ("React", ["React.js", "ReactJS"]),
+    ("Node.js", ["NodeJS", "Node JS"]),
+    ("FastAPI", []),
+    ("Django", []),
+    ("Flask", []),
+    ("Spring Boot", ["SpringBoot"]),
+    ("Docker", []),
+    ("Kubernetes", ["k8s"]),
+    ("AWS", ["Amazon Web Services"]),
+    ("Azure", ["Microsoft Azure"]),
+    ("GCP", ["Google Cloud", "Google Cloud Platform"]),
+    ("PostgreSQL", ["Postgres"]),
+    ("MySQL", []),
+    ("MongoDB", ["Mongo"]),
+    ("Redis", []),
+    ("Kafka", ["Apache Kafka"]),
+    ("RabbitMQ", []),
+    ("Microservices", ["Microservice"]),
+    ("REST APIs", ["REST API", "RESTful", "RESTful APIs", "REST"]),
+    ("GraphQL", []),
+    ("CI/CD", ["CICD", "CI-CD"]),
+    ("Terraform", []),
+    ("Ansible", []),
+    ("Linux", []),
+    ("Git", []),
+    ("Agile", []),
+    ("Scrum", []),
+    ("Machine Learning", ["ML"]),
+    ("TensorFlow", []),
+    ("PyTorch", []),
+    ("Spark", ["Apache Spark", "PySpark"]),
+    ("Airflow", ["Apache Airflow"]),
+    ("ETL", []),
+    ("SQL", []),
+    ("NoSQL", []),
+    ("Elasticsearch", ["Elastic Search"]),
+    ("Prometheus", []),
+    ("Grafana", []),
+    ("Jenkins", []),
+    ("GitHub Actions", []),
+]
+
+SKILL_NAMES: List[str] = [name for name, _ in SKILL_CATALOG]
+
+# Short aliases that are also ordinary words or letter pairs only match in
+# uppercase, so that "rest" or "js" inside prose are not mistaken for skills
+CASE_SENSITIVE_ALIASES = {"JS", "ML", "REST"}
+
+# Lowercased name/alias -> skill ID (case-insensitive forms)
+_ALIASES: Dict[str, int] = {}
+# Exact alias -> skill ID (case-sensitive acronyms)
+_EXACT_ALIASES: Dict[str, int] = {}
+
+for _skill_id, (_name, _aliases) in enumerate(SKILL_CATALOG):
+    _ALIASES[_name.lower()] = _skill_id
+    for _alias in _aliases:
+        if _alias in CASE_SENSITIVE_ALIASES:
+            _EXACT_ALIASES[_alias] = _skill_id
+        else:
+            _ALIASES[_alias.lower()] = _skill_id
+
+
+def _alternative(term: str, case_sensitive: bool) -> str:
+    pattern = r"\s+".join(re.escape(word) for word in term.split())
+    return f"(?-i:{pattern})" if case_sensitive else pattern
+
+
+# Longest terms first so "JavaScript" wins over "Java" and "GitHub Actions" over "Git";
+# the lookarounds stop matches inside longer words ("Java" in "Javadoc", "SQL" in "MySQL").
+_TERMS = sorted(
+    [(term, False) for term in _ALIASES] + [(term, True) for term in _EXACT_ALIASES],
+    key=lambda item: len(item[0]),
+    reverse=True,
+)
+SKILL_PATTERN = re.compile(
+    r"(?<![\w+#])(?:" + "|".join(_alternative(term, exact) for term, exact in _TERMS) + r")(?![\w+#])",
+    re.IGNORECASE,
+)
+
+
+def skill_id(name: str) -> Optional[int]:
+    """Resolve a skill name or alias to its ID"""
+    normalized = " ".join(name.split())
+    if normalized in _EXACT_ALIASES:
+        return _EXACT_ALIASES[normalized]
+    return _ALIASES.get(normalized.lower())
+
+
+def extract_skill_ids(text: str) -> List[int]:
+    """Sorted IDs of every catalog skill mentioned in the text"""
+    found = set()
+    with timed("skill_extract"):
+        for match in SKILL_PATTERN.finditer(text):
+            found.add(skill_id(match.group(0)))
+    found.discard(None)
+    return sorted(found)
+
+
+def skill_names(skill_ids: Iterable[int]) -> List[str]:
+    return [SKILL_NAMES[i] for i in skill_ids]
@@ -0,0 +1,88 @@
+"""
+Semantic top-k latency and recall of the IVF vector index.
+
+Embeds a synthetic corpus of job postings, builds the memory-mapped index in a
+temporary directory, then times VectorIndex.search with the default IVF_NPROBE
+against an exhaustive scan of the same index. Recall@k is the share of the
+exhaustive top k that the IVF search also returns. Pin BLAS to one core to
+measure single-core latency:
+
+    OPENBLAS_NUM_THREADS=1 python benchmarks/bench_ann.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("EMBEDDING_INDEX_DIR", tempfile.mkdtemp())
+
+import numpy as np  # noqa: E402
+
+from agent_service import embeddings  # noqa: E402
+from agent_service.skills import SKILL_NAMES  # noqa: E402
+
+ROLES = ["backend", "frontend", "data", "platform", "machine learning", "mobile", "security", "site reliability",
+         "full stack", "embedded", "qa", "analytics", "devops", "cloud", "firmware", "game"]
+LEVELS = ["junior", "senior", "staff", "principal", "lead", ""]
+WORDS = ("build scalable services design apis own features end to end mentor engineers improve reliability "
+         "performance monitoring pipelines dashboards customers product team collaborate ship production "
+         "testing automation infrastructure deploy migrate optimize latency throughput storage streaming "
+         "batch models experiments research analytics reporting payments search ranking recommendations "
+         "mobile web ios android compliance healthcare fintech retail logistics robotics gaming").split()
+
+
+def synthetic_job(rng):
+    role = rng.choice(ROLES)
+    skills = list(rng.choice(SKILL_NAMES, size=rng.integers(3, 9), replace=False))
+    words = " ".join(rng.choice(WORDS, size=rng.integers(40, 120)))
+    return {
+        "title": f"{rng.choice(LEVELS)} {role} engineer".strip(),
+        "description": f"{role} team. {words}. Experience with {', '.join(skills)}.",
+        "required_skills": skills,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    start = time.perf_counter()
+    raw = np.stack([embeddings.embed_job(synthetic_job(rng)) for _ in range(args.rows)])
+    embed_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = embeddings.publish_index(range(args.rows), raw)
+    build_s = time.perf_counter() - start
+    print(f"rows: {args.rows}, dim: {embeddings.EMBEDDING_DIM}, clusters: {len(index.centroids)}, "
+          f"nprobe: {embeddings.IVF_NPROBE}")
+    print(f"embed: {embed_s * 1000 / args.rows:.3f} ms/posting, build: {build_s:.1f} s")
+
+    queries = [embeddings.embed_job(synthetic_job(rng)) for _ in range(args.queries)]
+    exhaustive = len(index.centroids)
+    results = {}
+    for label, nprobe in (("exhaustive", exhaustive), ("ivf", embeddings.IVF_NPROBE)):
+        latencies, found = [], []
+        for query in queries:
+            start = time.perf_counter()
+            ids, _ = index.search(query, args.k, nprobe=nprobe)
+            latencies.append(time.perf_counter() - start)
+            found.append(set(ids.tolist()))
+        results[label] = found
+        ms = np.array(latencies) * 1000
+        print(f"{label:<11} p50 {np.percentile(ms, 50):6.2f} ms  p95 {np.percentile(ms, 95):6.2f} ms  "
+              f"p99 {np.percentile(ms, 99):6.2f} ms")
+
+    recall = np.mean([len(a & b) / len(a) for a, b in zip(results["exhaustive"], results["ivf"]) if a])
+    print(f"recall@{args.k}: {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Precomputed feed refresh throughput and feed read latency against scoring on request.
+
+Fills a throwaway SQLite database with synthetic users (with resume profiles)
+and postings, then times a full feed.refresh_feeds with one worker and with
+--workers processes, an incremental refresh after --new postings arrive, and
+reading one user's feed from user_job_matches compared with scoring that user
+against every stored posting on request, as a search without the feed would.
+
+Some of the new postings are longer reposts of stored ones, which replace them
+as canonical. The feeds after the incremental refresh must equal those of
+rescoring every user against every posting with the same pinned IDF weights;
+the benchmark checks that they do.
+
+    python benchmarks/bench_feed.py --users 2000 --postings 20000 --workers 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+scratch = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(scratch, "bench.db"))
+os.environ.setdefault("EMBEDDING_INDEX_DIR", os.path.join(scratch, "vectors"))
+
+import numpy as np  # noqa: E402
+
+import crud  # noqa: E402
+import feed  # noqa: E402
+import models  # noqa: E402
+from agent_service.job_matcher import score_jobs  # noqa: E402
+from bench_ann import WORDS, synthetic_job  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from agent_service.skills import SKILL_NAMES  # noqa: E402
+
+
+def add_postings(rng, count, first, reposts=0):
+    """count new postings, the first reposts of them longer copies of stored postings"""
+    jobs = []
+    if reposts:
+        db = SessionLocal()
+        try:
+            stored = crud.job_postings_to_dicts(db, crud.get_all_job_postings(db))
+        finally:
+            db.close()
+        for i in rng.choice(len(stored), size=reposts, replace=False).tolist():
+            job = stored[i]
+            jobs.append({key: job[key] for key in ("title", "company", "location", "required_skills")}
+                        | {"description": job["description"] + " Apply today.",
+                           "url": f"https://jobs.example.com/{first + len(jobs)}"})
+    for i in range(len(jobs), count):
+        job = synthetic_job(rng)
+        jobs.append({**job, "company": f"Company {rng.integers(500)}", "location": "Remote",
+                     "url": f"https://jobs.example.com/{first + i}"})
+    db = SessionLocal()
+    try:
+        for i in range(0, count, 1000):
+            crud.upsert_job_postings(db, jobs[i:i + 1000], source="bench")
+    finally:
+        db.close()
+
+
+def add_users(rng, count):
+    db = SessionLocal()
+    try:
+        users = [models.User(name=f"User {i}", email=f"user{i}@example.com") for i in range(count)]
+        db.add_all(users)
+        db.commit()
+        for user in users:
+            skills = ", ".join(rng.choice(SKILL_NAMES, size=rng.integers(4, 12), replace=False))
+            words = " ".join(rng.choice(WORDS, size=40))
+            crud.upsert_resume_profile(db, user.id, f"Skills: {skills}\nWork history: {words}")
+        return [user.id for user in users]
+    finally:
+        db.close()
+
+
+def stored_feeds(user_ids):
+    db = SessionLocal()
+    try:
+        stored = crud.get_stored_matches(db, user_ids)
+    finally:
+        db.close()
+    return {user_id: sorted((m["posting_id"], m["score"], m["alternate_urls"]) for m in matches)
+            for user_id, matches in stored.items()}
+
+
+def timed_refresh(label, **kwargs):
+    start = time.perf_counter()
+    users = feed.refresh_feeds(**kwargs)
+    seconds = time.perf_counter() - start
+    print(f"{label:<28}{users:>7} users {seconds:>8.2f} s {users / seconds:>9.0f} users/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--postings", type=int, default=20000)
+    parser.add_argument("--new", type=int, default=500, help="postings added before the incremental refresh")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    models.Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    add_postings(rng, args.postings, 0)
+    user_ids = add_users(rng, args.users)
+    print(f"users: {args.users}, postings: {args.postings}, top k: {feed.FEED_TOP_K}, "
+          f"shard: {feed.FEED_SHARD_SIZE} users, setup {time.perf_counter() - start:.0f} s")
+
+    timed_refresh("full, 1 worker", full=True, workers=1)
+    # On the pool whatever its size, to compare with one process
+    pool_min_pairs, feed.FEED_POOL_MIN_PAIRS = feed.FEED_POOL_MIN_PAIRS, 0
+    timed_refresh(f"full, {args.workers} workers", full=True, workers=args.workers)
+    feed.FEED_POOL_MIN_PAIRS = pool_min_pairs
+    add_postings(rng, args.new, args.postings, reposts=args.new // 10)
+    timed_refresh(f"incremental, +{args.new} postings", workers=args.workers)
+    incremental = stored_feeds(user_ids)
+    # Without feed states every user is rescored from scratch, still with the pinned IDF
+    db = SessionLocal()
+    try:
+        db.query(models.UserFeedState).delete()
+        db.commit()
+    finally:
+        db.close()
+    feed.refresh_feeds(full=False, workers=args.workers)
+    differing = sum(incremental.get(u) != feeds for u, feeds in stored_feeds(user_ids).items())
+    if differing:
+        sys.exit(f"{differing} feeds differ between the incremental refresh and rescoring every posting")
+
+    db = SessionLocal()
+    try:
+        corpus = crud.job_postings_to_dicts(db, crud.get_all_job_postings(db))
+        sample = rng.choice(user_ids, size=min(args.reads, len(user_ids)), replace=False)
+        latencies = {"feed read": [], "score on request": []}
+        for user_id in sample.tolist():
+            start = time.perf_counter()
+            [crud.user_job_match_to_dict(m) for m in crud.get_user_feed(db, user_id)]
+            latencies["feed read"].append(time.perf_counter() - start)
+
+            profile = crud.get_resume_profile(db, user_id)
+            start = time.perf_counter()
+            score_jobs(profile.text, corpus, "", min_score=feed.FEED_MIN_SCORE, top_k=feed.FEED_TOP_K,
+                       resume_skill_ids=json.loads(profile.skill_ids))
+            latencies["score on request"].append(time.perf_counter() - start)
+    finally:
+        db.close()
+
+    print(f"\n{'per user':<20}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, values in latencies.items():
+        ms = np.array(values) * 1000
+        print(f"{label:<20}{np.percentile(ms, 50):>10.2f}{np.percentile(ms, 95):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Cold-start import time of the API, from python -X importtime.
+
+Imports a module (main by default) in fresh interpreters, reports the median
+total import time and the slowest top-level dependencies, and exits non-zero
+when the median exceeds --budget-ms or when a module that should load lazily
+(the Mistral SDK, requests, BeautifulSoup, langchain) is imported at startup,
+so CI can catch cold-start regressions. -X importtime itself adds some
+overhead, so compare runs on the same machine.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --budget-ms 800 --runs 9
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ["mistralai", "requests", "bs4", "langchain", "langchain_community"]
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module, env):
+    """{module: (self us, cumulative us, depth)} for one fresh import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for match in LINE.finditer(result.stderr):
+        self_us, cumulative_us, indent, name = match.groups()
+        times[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    # Importing main creates tables; keep that away from the real database
+    scratch = tempfile.mkdtemp()
+    env = {**os.environ, "DATABASE_URL": "sqlite:///" + os.path.join(scratch, "bench.db"), "CACHE_DIR": scratch}
+
+    runs = [import_times(args.module, env) for _ in range(args.runs)]
+    totals = [run[args.module][1] / 1000 for run in runs]
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.0f} ms, min {min(totals):.0f} ms, max {max(totals):.0f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    # Dependencies imported directly by the module, by median cumulative time
+    last = runs[-1]
+    direct = [name for name, (_, _, depth) in last.items() if depth == 1]
+    cumulative = {name: statistics.median(run[name][1] for run in runs if name in run) / 1000 for name in direct}
+    print(f"\n{'module':<32}{'cumulative ms':>14}")
+    for name, ms in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<32}{ms:>14.1f}")
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"median import time {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    eager = sorted({name.split(".")[0] for name in last} & set(LAZY_MODULES))
+    if eager:
+        failures.append(f"imported at startup but should load lazily: {', '.join(eager)}")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
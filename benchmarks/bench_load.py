@@ -0,0 +1,243 @@
+"""
+Offline load test of the API endpoints against fake LinkedIn, job pages and Mistral.
+
+Starts benchmarks/fake_services.py and the FastAPI app (uvicorn, in this
+process) on local ports with a throwaway database and memory-only caches, then
+sends --requests requests per endpoint with --concurrency in flight and reports
+throughput and p50/p95/p99 latency per endpoint. Per-stage percentiles come
+from the app's own stage histograms (bucket estimates, as on /metrics). Every
+request uses a distinct resume and JD URL unless --repeat is given, so the JD
+and LLM caches only hit with --repeat. No network access is needed.
+
+    python benchmarks/bench_load.py --concurrency 16 --requests 200
+    python benchmarks/bench_load.py --endpoints analyze,stream --llm-latency-ms 1500 --llm-error-rate 0.05
+    python benchmarks/bench_load.py --json results.json    # compare runs across releases
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from fake_services import FakeServices  # noqa: E402
+
+RESUME = """Backend engineer with five years of Python, FastAPI and Django experience.
+Built event-driven services on Kafka and PostgreSQL, deployed with Docker and Kubernetes on AWS.
+Set up CI/CD with GitHub Actions and Terraform; on call for services handling 2k requests per second."""
+
+PROFILE = "Skills: Python, FastAPI, PostgreSQL, Docker, AWS. Five years building backend services."
+
+# A typical application form
+FORM_QUESTIONS = [
+    "Why are you a good fit?",
+    "Why do you want to work here?",
+    "Describe a system you designed end to end.",
+    "Tell us about a production incident you handled.",
+    "How do you approach code review?",
+    "What is your experience with cloud infrastructure?",
+    "Describe a time you disagreed with a teammate.",
+    "What are you looking for in your next role?",
+]
+
+
+def build_requests(base, jd_names, repeat):
+    """Endpoint name -> function(i) returning (method, path, json body)"""
+    def jd_url(i, offset=0):
+        name = jd_names[(i + offset) % len(jd_names)]
+        return f"{base}/jobs/{name}" if repeat else f"{base}/jobs/{name}?req={i}"
+
+    def resume(i):
+        return RESUME if repeat else f"{RESUME}\nReference {i}."
+
+    def question(i):
+        return "Why are you a good fit?" if repeat else f"Why are you a good fit? ({i})"
+
+    return {
+        "analyze": lambda i: ("POST", "/api/resume/analyze", {"resume": resume(i), "jd_url": jd_url(i)}),
+        "stream": lambda i: ("POST", "/api/resume/analyze/stream", {"resume": resume(i), "jd_url": jd_url(i)}),
+        "answer": lambda i: ("POST", "/api/generate/answer", {
+            "profile": PROFILE, "jd_url": jd_url(i), "question": question(i)}),
+        "answers": lambda i: ("POST", "/api/generate/answers", {
+            "profile": PROFILE, "jd_url": jd_url(i),
+            "questions": FORM_QUESTIONS if repeat else [f"{q} ({i})" for q in FORM_QUESTIONS]}),
+        "batch": lambda i: ("POST", "/api/resume/analyze/batch", {
+            "resumes": [resume(i)], "jd_urls": [jd_url(i, k) for k in range(3)]}),
+        "search": lambda i: ("POST", "/api/jobs/search", {
+            "resume": resume(i), "job_query": "engineer", "min_match_score": 0, "max_results": 25}),
+        "search_semantic": lambda i: ("POST", "/api/jobs/search", {
+            "resume": resume(i), "job_query": "engineer", "min_match_score": 0, "max_results": 25,
+            "mode": "semantic"}),
+        "status": lambda i: ("GET", "/status", None),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(port):
+    """Run main:app under uvicorn in a daemon thread; returns the server"""
+    import uvicorn
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_endpoint(client, make_request, count, concurrency):
+    """(wall seconds, latencies in seconds, error count) of count requests"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        method, path, body = make_request(i)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                # SSE endpoints report failures in the stream
+                failed = response.status_code >= 400 or b"event: error" in response.content
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def stage_report(metrics):
+    stages = {}
+    for labels in metrics.STAGE_SECONDS.label_sets():
+        stage = labels["stage"]
+        stages[stage] = {
+            "count": metrics.STAGE_SECONDS.count(stage=stage),
+            "errors": int(metrics.STAGE_ERRORS.value(stage=stage)),
+            **{f"p{int(q * 100)}_ms": metrics.STAGE_SECONDS.quantile(q, stage=stage) * 1000
+               for q in (0.5, 0.95, 0.99)},
+        }
+    return stages
+
+
+async def drive(args, base_url, fake_url, jd_names):
+    requests = build_requests(fake_url, jd_names, args.repeat)
+    unknown = set(args.endpoints) - set(requests)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        for position, name in enumerate(args.endpoints):
+            # Each endpoint gets its own inputs, so e.g. stream does not hit analyze's cached responses
+            first = position * (args.requests + 2)
+            make_request = lambda i, build=requests[name], first=first: build(first + i)  # noqa: E731
+            # Warm-up: imports, connection pool, first-use compilation
+            await run_endpoint(client, lambda i: make_request(args.requests + i), 2, 2)
+            wall, latencies, errors = await run_endpoint(client, make_request, args.requests, args.concurrency)
+            ms = np.array(latencies) * 1000
+            results[name] = {
+                "requests": args.requests,
+                "errors": errors,
+                "rps": args.requests / wall,
+                **{f"p{q}_ms": float(np.percentile(ms, q)) for q in (50, 95, 99)},
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--endpoints", default="analyze,stream,answer,batch,search",
+                        help="comma-separated: analyze, stream, answer, answers, batch, search, search_semantic, status")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", action="store_true", help="reuse the same inputs so caches hit")
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0,
+                        help="share of free-form JSON replies garbled (MISTRAL_JSON_MODE=0 to exercise repair)")
+    parser.add_argument("--page-latency-ms", type=float, default=20)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's INFO logs")
+    args = parser.parse_args()
+    args.endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+
+    fake = FakeServices(llm_latency_ms=args.llm_latency_ms, llm_jitter_ms=args.llm_jitter_ms,
+                        llm_error_rate=args.llm_error_rate, page_latency_ms=args.page_latency_ms,
+                        llm_malformed_rate=args.llm_malformed_rate).start()
+
+    # The app reads its settings at import time
+    scratch = tempfile.mkdtemp()
+    for name, value in {
+        "DATABASE_URL": "sqlite:///" + os.path.join(scratch, "bench.db"),
+        "CACHE_DIR": scratch,
+        "EMBEDDING_INDEX_DIR": os.path.join(scratch, "vectors"),
+        "JD_CACHE_PATH": "",
+        "LLM_CACHE_PATH": "",
+        "JOB_INGEST_QUERIES": "",
+        "TASK_WORKERS": "0",
+        "LINKEDIN_BASE_URL": fake.url,
+        "MISTRAL_SERVER_URL": fake.url,
+        "MISTRAL_API_KEY": "bench",
+        "SCRAPE_RATE_PER_HOST": "1000000",
+        "SCRAPE_BURST_PER_HOST": "1000000",
+    }.items():
+        os.environ.setdefault(name, value)
+    os.chdir(ROOT)  # main.py serves ./static
+
+    port = free_port()
+    server = start_app(port)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    from agent_service import agent, metrics
+
+    try:
+        results = asyncio.run(drive(args, f"http://127.0.0.1:{port}", fake.url, sorted(fake.jd_pages)))
+    finally:
+        server.should_exit = True
+        fake.stop()
+
+    print(f"concurrency: {args.concurrency}, requests/endpoint: {args.requests}, "
+          f"llm latency: {args.llm_latency_ms:.0f}±{args.llm_jitter_ms:.0f} ms, "
+          f"llm error rate: {args.llm_error_rate:.0%}, caches: {'warm' if args.repeat else 'cold'}")
+    print(f"{'endpoint':<16}{'errors':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['errors']:>7}{r['rps']:>9.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+    stages = stage_report(metrics)
+    print(f"\n{'stage':<16}{'count':>7}{'errors':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in stages.items():
+        print(f"{name:<16}{s['count']:>7}{s['errors']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+    parse = {outcome: int(agent.LLM_PARSE_RESULTS.value(outcome=outcome)) for outcome in ("valid", "repaired", "failed")}
+    print(f"\nresume analysis responses: {parse}, wasted LLM time: {agent.LLM_WASTED_SECONDS.value():.1f} s")
+    print(f"upstream requests: {fake.stats}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "endpoints": results, "stages": stages, "llm_parse": parse,
+                       "upstream": fake.stats}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+HTML parse time per page for each installed parser backend.
+
+Cards: a saved LinkedIn guest search page, parsed the previous way (whole page
+with html.parser, then card.find with fallbacks per field) and with
+parsing.parse_job_cards on every backend. Job pages: the JD fixtures through
+scraper.clean_job_description on every backend.
+
+    python benchmarks/bench_parsing.py --repeat 50
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from agent_service import parsing  # noqa: E402
+from agent_service.compaction import compact_job_description  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_cards(html, max_results):
+    """The previous card extraction: full html.parser tree and up to 10 finds per card"""
+    soup = BeautifulSoup(html, "html.parser")
+    cards = soup.find_all("div", class_="base-card", limit=max_results) or soup.find_all("li", limit=max_results)
+    rows = []
+    for card in cards:
+        title = card.find("h3", class_="base-search-card__title") or card.find("a", class_="base-card__full-link")
+        company = card.find("h4", class_="base-search-card__subtitle") or card.find("a", class_="hidden-nested-link")
+        location = card.find("span", class_="job-search-card__location")
+        link = card.find("a", class_="base-card__full-link") or card.find("a", href=True)
+        snippet = card.find("p", class_="base-search-card__snippet")
+        rows.append((title, company, location, link, snippet))
+    return rows
+
+
+def clean(html, backend):
+    soup = parsing.parse_document(html, backend)
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
+    return compact_job_description(soup)
+
+
+def per_page_ms(fn, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    return (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-results", type=int, default=25)
+    args = parser.parse_args()
+
+    search_pages = [open(p, "rb").read() for p in sorted(glob.glob(os.path.join(FIXTURES, "search", "*.html")))]
+    job_pages = [open(p, "rb").read() for p in sorted(glob.glob(os.path.join(FIXTURES, "*.html")))]
+
+    backends = ["html.parser"]
+    if parsing.HAS_LXML:
+        backends.append("lxml")
+    if parsing.SelectolaxParser is not None:
+        backends.append("selectolax")
+    print(f"default backend: {parsing.PARSER_BACKEND}")
+
+    baseline = per_page_ms(lambda html: legacy_cards(html, args.max_results), search_pages, args.repeat)
+    print(f"\nsearch page ({args.max_results} cards)   ms/page   speedup")
+    print(f"{'legacy html.parser + find':<30} {baseline:8.2f}   {1:6.1f}x")
+    for backend in backends:
+        ms = per_page_ms(lambda html: parsing.parse_job_cards(html, args.max_results, backend), search_pages, args.repeat)
+        print(f"{backend:<30} {ms:8.2f}   {baseline / ms:6.1f}x")
+
+    print("\njob page (clean + compact)      ms/page   speedup")
+    # Job pages go through BeautifulSoup for compaction; selectolax only parses cards
+    baseline = None
+    for backend in [b for b in backends if b != "selectolax"]:
+        ms = per_page_ms(lambda html: clean(html, backend), job_pages, args.repeat)
+        baseline = baseline or ms
+        print(f"{backend:<30} {ms:8.2f}   {baseline / ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Job description tokens sent to Mistral before and after compaction.
+
+Before: the page text truncated to its first 6000 characters.
+After: scraper.clean_job_description (relevant sections, boilerplate and
+repeats removed, capped at JD_MAX_TOKENS). Catalog skills found in the full
+page are checked against each version to show what the prompt keeps.
+
+Also compares the input tokens of answering an application form with one
+tailored answer prompt per question against one multi-question prompt.
+
+    python benchmarks/bench_tokens.py
+    python benchmarks/bench_tokens.py path/to/pages/*.html
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from agent_service.agent import build_batch_tailored_answer_prompt, build_tailored_answer_prompt  # noqa: E402
+from agent_service.compaction import estimate_tokens  # noqa: E402
+from agent_service.scraper import clean_job_description  # noqa: E402
+from agent_service.skills import extract_skill_ids  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "*.html")
+
+PROFILE = ("Backend engineer, five years of Python, FastAPI and Django. Built event-driven services on Kafka "
+           "and PostgreSQL, deployed with Docker and Kubernetes on AWS. Led the migration of a monolith to "
+           "microservices and set up CI/CD with GitHub Actions and Terraform.")
+FORM_QUESTIONS = [
+    "Why are you a good fit?",
+    "Why do you want to work here?",
+    "Describe a system you designed end to end.",
+    "Tell us about a production incident you handled.",
+    "How do you approach code review?",
+    "What is your experience with cloud infrastructure?",
+    "Describe a time you disagreed with a teammate.",
+    "What are you looking for in your next role?",
+]
+
+
+def truncated_text(html):
+    """The previous cleaning: all visible text, cut at 6000 characters"""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        tag.decompose()
+    return " ".join(soup.get_text(separator=" ").split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("pages", nargs="*", help="HTML files (default: benchmarks/fixtures)")
+    args = parser.parse_args()
+    paths = args.pages or sorted(glob.glob(FIXTURES))
+
+    print(f"{'page':<32} {'before':>7} {'after':>7} {'saved':>6}  skills kept before/after")
+    total_before = total_after = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        full = truncated_text(html)
+        before, after = full[:6000], clean_job_description(html)
+        skills = set(extract_skill_ids(full))
+        kept_before = len(skills & set(extract_skill_ids(before)))
+        kept_after = len(skills & set(extract_skill_ids(after)))
+
+        tokens_before, tokens_after = estimate_tokens(before), estimate_tokens(after)
+        total_before += tokens_before
+        total_after += tokens_after
+        print(f"{os.path.basename(path):<32} {tokens_before:7d} {tokens_after:7d} "
+              f"{1 - tokens_after / tokens_before:6.0%}  {kept_before}/{len(skills)} {kept_after}/{len(skills)}")
+
+    print(f"{'total':<32} {total_before:7d} {total_after:7d} {1 - total_after / total_before:6.0%}")
+
+    print(f"\n{len(FORM_QUESTIONS)}-question form: input tokens")
+    print(f"{'page':<32} {'separate':>9} {'one call':>9} {'saved':>6}")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            jd = clean_job_description(f.read())
+        separate = sum(estimate_tokens(build_tailored_answer_prompt(PROFILE, jd, q)) for q in FORM_QUESTIONS)
+        combined = estimate_tokens(build_batch_tailored_answer_prompt(PROFILE, jd, FORM_QUESTIONS))
+        print(f"{os.path.basename(path):<32} {separate:9d} {combined:9d} {1 - combined / separate:6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Local stand-ins for LinkedIn, job description pages and the Mistral API.
+
+One threaded HTTP server answers:
+
+    /jobs-guest/jobs/api/seeMoreJobPostings/search   recorded LinkedIn search page
+    /jobs/<fixture>[?...]                            recorded job description pages
+    /v1/chat/completions                             fake Mistral chat completions (JSON or SSE)
+
+Mistral responses wait for a configurable latency with jitter and fail with a
+configurable share of 429/503 responses. Without a JSON response_format, a
+configurable share of JSON replies comes back wrapped in prose and code fences
+with a trailing comma, the way free-form model output breaks. Point the API at it with
+LINKEDIN_BASE_URL and MISTRAL_SERVER_URL; bench_load.py does this itself.
+
+    python benchmarks/fake_services.py --port 8900 --llm-latency-ms 800
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+SEARCH_PATH = "/jobs-guest/jobs/api/seeMoreJobPostings/search"
+COMPLETIONS_PATH = "/v1/chat/completions"
+
+SKILLS = ["Python", "Docker", "Kubernetes", "AWS", "PostgreSQL", "Kafka", "Terraform", "React"]
+
+
+def load_fixtures():
+    """(search page, {name: JD page}) from benchmarks/fixtures"""
+    with open(os.path.join(FIXTURES, "search", "linkedin_guest_page.html"), "rb") as f:
+        search_page = f.read()
+    pages = {}
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.endswith(".html"):
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                pages[name[:-len(".html")]] = f.read()
+    return search_page, pages
+
+
+def malformed(content: str) -> str:
+    """content as a chatty model might send it: in prose and a code fence, with a trailing comma"""
+    return f"Here is the analysis:\n```json\n{content[:-1]},{content[-1]}\n```\nLet me know if you need more."
+
+
+def fake_completion(prompt: str, rng: random.Random) -> str:
+    """A plausible, valid reply for each of the agent's prompt types"""
+    def score():
+        return {
+            "score": rng.randint(30, 95),
+            "missing_skills": rng.sample(SKILLS, 2),
+            "suggestions": ["Quantify the impact of your recent projects", "Mention production experience"],
+        }
+
+    if "Application Questions:" in prompt:
+        questions = prompt.split("Application Questions:", 1)[1].split("For each numbered question", 1)[0]
+        count = len(re.findall(r"^\d+\. ", questions, re.MULTILINE))
+        return json.dumps({"answers": [
+            {"question": i, "answer": f"Answer {i}: five years of backend work in Python map onto this role."}
+            for i in range(1, count + 1)
+        ]})
+    if "each numbered Job Description" in prompt:
+        count = len(re.findall(r"^Job Description \d+:", prompt, re.MULTILINE))
+        return json.dumps({"scores": [{"jd": i, **score()} for i in range(1, count + 1)]})
+    if "Compare Resume vs Job Description" in prompt:
+        return json.dumps(score())
+    return ("I have spent the last three years building and operating backend services in Python, "
+            "which maps directly onto the responsibilities in this role.\n\n"
+            "I would bring the same focus on reliability and clear communication to your team.")
+
+
+class FakeServices:
+    """The fake upstreams, served from a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, llm_latency_ms: float = 500,
+                 llm_jitter_ms: float = 200, llm_error_rate: float = 0.0, page_latency_ms: float = 20,
+                 llm_malformed_rate: float = 0.0, seed: int = 0):
+        self.llm_latency = llm_latency_ms / 1000
+        self.llm_jitter = llm_jitter_ms / 1000
+        self.llm_error_rate = llm_error_rate
+        self.llm_malformed_rate = llm_malformed_rate
+        self.page_latency = page_latency_ms / 1000
+        self.search_page, self.jd_pages = load_fixtures()
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {"search": 0, "jd": 0, "llm": 0, "llm_errors": 0, "llm_malformed": 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServices":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _random(self, fn):
+        with self.rng_lock:
+            return fn(self.rng)
+
+    def _count(self, name: str) -> int:
+        with self.rng_lock:
+            self.stats[name] += 1
+            return self.stats[name]
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body: bytes, content_type="text/html; charset=utf-8", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = urllib.parse.urlsplit(self.path).path
+                time.sleep(services.page_latency)
+                if path == SEARCH_PATH:
+                    services._count("search")
+                    return self._send(200, services.search_page)
+                name = path.rsplit("/", 1)[-1]
+                if path.startswith("/jobs/") and name in services.jd_pages:
+                    services._count("jd")
+                    return self._send(200, services.jd_pages[name])
+                self._send(404, b"not found", "text/plain")
+
+            def do_POST(self):
+                if urllib.parse.urlsplit(self.path).path != COMPLETIONS_PATH:
+                    return self._send(404, b"not found", "text/plain")
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                number = services._count("llm")
+
+                delay, failed, content, garbled = services._random(lambda rng: (
+                    max(0.0, services.llm_latency + rng.uniform(-services.llm_jitter, services.llm_jitter)),
+                    rng.random() < services.llm_error_rate,
+                    fake_completion(request["messages"][-1]["content"], rng),
+                    rng.random() < services.llm_malformed_rate,
+                ))
+                # A JSON response_format constrains the output, so only free-form replies get garbled
+                if garbled and not request.get("response_format") and content.startswith(("{", "[")):
+                    services._count("llm_malformed")
+                    content = malformed(content)
+                if failed:
+                    services._count("llm_errors")
+                    time.sleep(delay / 4)
+                    status = services._random(lambda rng: rng.choice((429, 503)))
+                    body = json.dumps({"object": "error", "message": "fake upstream error"}).encode()
+                    return self._send(status, body, "application/json", {"Retry-After": "0"})
+
+                completion_id = f"cmpl-{number}"
+                if request.get("stream"):
+                    return self._stream(request, completion_id, content, delay)
+                time.sleep(delay)
+                self._send(200, json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                }).encode(), "application/json")
+
+            def _stream(self, request, completion_id, content, delay):
+                # Spread the latency over the chunks, like tokens arriving
+                pieces = re.findall(r"\S+\s*", content) or [content]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                for piece in pieces:
+                    time.sleep(delay / len(pieces))
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": request["model"],
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--llm-latency-ms", type=float, default=500)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--page-latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    services = FakeServices(args.host, args.port, args.llm_latency_ms, args.llm_jitter_ms,
+                            args.llm_error_rate, args.page_latency_ms, args.llm_malformed_rate)
+    print(f"Serving fake LinkedIn, job pages ({', '.join(services.jd_pages)}) and Mistral on {services.url}")
+    print(f"  LINKEDIN_BASE_URL={services.url} MISTRAL_SERVER_URL={services.url}")
+    try:
+        services.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,20 @@
-from models import User, JobApplication
+import base64
+import hashlib
+import json
+import uuid
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, text, update
+
+from models import (
+    User, JobApplication, JobPosting, JobPostingEmbedding, JobPostingSignature, AnalysisTask, ResumeProfile,
+    UserJobMatch, UserFeedState, FeedWeights,
+)
+from agent_service.dedup import NUM_PERM, job_text, minhash, signature_from_bytes
+from agent_service.embeddings import EMBEDDING_DIM, embed_job, embed_text, get_index, vector_from_bytes
+from agent_service.scraper import normalize_url
+from agent_service.skills import extract_skill_ids, skill_id
 
 
 def create_user(db, user):
@@ -6,6 +22,7 @@ def create_user(db, user):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    upsert_resume_profile(db, db_user.id, user_resume_text(db_user))
     return db_user
 
 
@@ -13,6 +30,56 @@ def get_user(db, user_id):
     return db.query(User).filter(User.id == user_id).first()
 
 
+# User fields the resume profile is built from, its only source
+RESUME_FIELDS = {"skills", "education", "work_history"}
+
+
+def update_user(db, user_id, updates):
+    db_user = get_user(db, user_id)
+    if db_user:
+        changes = updates.dict(exclude_unset=True)
+        for field, value in changes.items():
+            setattr(db_user, field, value)
+        db.commit()
+        db.refresh(db_user)
+        if RESUME_FIELDS.intersection(changes):
+            upsert_resume_profile(db, db_user.id, user_resume_text(db_user))
+    return db_user
+
+
+def user_resume_text(user):
+    """Resume text assembled from the profile fields"""
+    return "\n".join(
+        f"{label}: {value}"
+        for label, value in (("Skills", user.skills), ("Education", user.education), ("Work history", user.work_history))
+        if value
+    )
+
+
+def get_resume_profile(db, user_id):
+    return db.query(ResumeProfile).filter(ResumeProfile.user_id == user_id).first()
+
+
+def upsert_resume_profile(db, user_id, resume_text):
+    """Store the user's preprocessed resume; unchanged text costs one hash and no extraction"""
+    text = " ".join(resume_text.split())
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    profile = get_resume_profile(db, user_id)
+    if profile is not None and profile.text_hash == text_hash:
+        return profile
+
+    if profile is None:
+        profile = ResumeProfile(user_id=user_id)
+        db.add(profile)
+    profile.text = text
+    profile.text_hash = text_hash
+    profile.skill_ids = json.dumps(extract_skill_ids(text))
+    profile.embedding = embed_text(text).tobytes()
+    db.commit()
+    db.refresh(profile)
+    return profile
+
+
 def create_job_application(db, application):
     db_app = JobApplication(**application.dict())
     db.add(db_app)
@@ -21,8 +88,107 @@ def create_job_application(db, application):
     return db_app
 
 
-def get_user_applications(db, user_id):
-    return db.query(JobApplication).filter(JobApplication.user_id == user_id).all()
+# Columns returned by the dashboard's summary mode (no notes / jd_url text)
+APPLICATION_SUMMARY_COLUMNS = (
+    JobApplication.id, JobApplication.user_id, JobApplication.company_name,
+    JobApplication.job_title, JobApplication.status, JobApplication.score, JobApplication.applied_date,
+)
+
+# Raw columns, so the (user_id, column, id) indexes serve both the ORDER BY and the keyset range
+APPLICATION_SORT_KEYS = {
+    "applied_date": JobApplication.applied_date,
+    "score": JobApplication.score,
+    "status": JobApplication.status,
+}
+
+
+def encode_cursor(sort, value, app_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, app_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor, sort):
+    try:
+        cursor_sort, value, app_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    if sort == "applied_date" and value is not None:
+        value = datetime.fromisoformat(value)
+    return value, app_id
+
+
+def _after_cursor(sort_key, value, app_id, descending):
+    """Rows that come after (value, app_id) in the sort order"""
+    if descending:
+        return or_(sort_key < value, and_(sort_key == value, JobApplication.id < app_id))
+    return or_(sort_key > value, and_(sort_key == value, JobApplication.id > app_id))
+
+
+def _application_segments(query, sort, descending, cursor, include_nulls):
+    """
+    Queries whose rows, concatenated, are the page order after the cursor.
+    Rows with a NULL sort value (unscored applications, a status set to null)
+    sort lowest (last when descending), as their own segment: a keyset range
+    never matches NULL, and an OR with "IS NULL" would turn the range into a
+    scan of the user's rows.
+    """
+    sort_key = APPLICATION_SORT_KEYS[sort]
+    value, app_id = decode_cursor(cursor, sort) if cursor else (None, None)
+    present = query.filter(sort_key.isnot(None))
+    missing = query.filter(sort_key.is_(None)) if include_nulls else None
+    if cursor and value is None:
+        # The cursor is inside the NULL rows: continue by id alone
+        present = present if not descending else None
+        if missing is not None:
+            missing = missing.filter(JobApplication.id < app_id if descending else JobApplication.id > app_id)
+    elif cursor:
+        present = present.filter(_after_cursor(sort_key, value, app_id, descending))
+        missing = missing if descending else None
+    segments = [present, missing] if descending else [missing, present]
+    return [segment for segment in segments if segment is not None]
+
+
+def get_user_applications(db, user_id, status=None, min_score=None, sort="applied_date",
+                          descending=True, cursor=None, limit=None, summary=False):
+    """
+    A user's applications, filtered and sorted, one keyset page at a time.
+    Returns (rows, next_cursor); without a limit every row is returned and next_cursor is None.
+    """
+    sort_key = APPLICATION_SORT_KEYS[sort]
+    query = db.query(*APPLICATION_SUMMARY_COLUMNS) if summary else db.query(JobApplication)
+    query = query.filter(JobApplication.user_id == user_id)
+
+    if status is not None:
+        query = query.filter(JobApplication.status == status)
+    if min_score is not None:
+        query = query.filter(JobApplication.score >= min_score)
+
+    if descending:
+        query = query.order_by(sort_key.desc(), JobApplication.id.desc())
+    else:
+        query = query.order_by(sort_key.asc(), JobApplication.id.asc())
+
+    rows = []
+    # A filter on the sort column already excludes its NULL rows
+    filtered = {"score": min_score, "status": status}.get(sort)
+    for segment in _application_segments(query, sort, descending, cursor, filtered is None):
+        if limit is None:
+            rows.extend(segment.all())
+            continue
+        # Fetch one extra row to learn whether another page exists
+        rows.extend(segment.limit(limit + 1 - len(rows)).all())
+        if len(rows) > limit:
+            break
+
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, getattr(last, sort), last.id)
 
 
 def update_job_application(db, app_id, updates):
@@ -33,3 +199,458 @@ def update_job_application(db, app_id, updates):
         db.commit()
         db.refresh(db_app)
     return db_app
+
+
+def bulk_create_job_applications(db, user_id, applications):
+    """Insert many applications with one executemany INSERT in a single transaction"""
+    rows = []
+    for application in applications:
+        row = application.dict()
+        row["user_id"] = user_id
+        if row["applied_date"] is None:
+            del row["applied_date"]
+        rows.append(row)
+    if not rows:
+        return 0
+    # Rows without applied_date fall back to the server default
+    with_date = [row for row in rows if "applied_date" in row]
+    without_date = [row for row in rows if "applied_date" not in row]
+    for batch in (with_date, without_date):
+        if batch:
+            db.execute(insert(JobApplication), batch)
+    db.commit()
+    return len(rows)
+
+
+def bulk_update_job_applications(db, updates):
+    """Apply the same status/score/notes to many applications with one UPDATE ... WHERE id IN"""
+    values = updates.dict(exclude_unset=True, exclude={"ids"})
+    if not values or not updates.ids:
+        return 0
+    result = db.execute(
+        update(JobApplication)
+        .where(JobApplication.id.in_(updates.ids))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def iter_user_applications(db, user_id, batch_size=1000):
+    """Stream a user's applications without loading them all into memory"""
+    query = (
+        db.query(JobApplication)
+        .filter(JobApplication.user_id == user_id)
+        .order_by(JobApplication.id)
+        .yield_per(batch_size)
+    )
+    for application in query:
+        yield application
+
+
+def update_application_scores(db, user_id, scores):
+    """Set score on the user's applications by jd_url in one executemany UPDATE"""
+    if not scores:
+        return 0
+    stmt = (
+        update(JobApplication)
+        .where(JobApplication.user_id == bindparam("uid"), JobApplication.jd_url == bindparam("url"))
+        .values(score=bindparam("new_score"))
+        .execution_options(synchronize_session=False)
+    )
+    result = db.connection().execute(
+        stmt, [{"uid": user_id, "url": url, "new_score": score} for url, score in scores.items()]
+    )
+    db.commit()
+    return result.rowcount
+
+
+def create_task(db, kind, payload):
+    task = AnalysisTask(id=uuid.uuid4().hex, kind=kind, status="queued", payload=json.dumps(payload))
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+def get_task(db, task_id):
+    return db.query(AnalysisTask).filter(AnalysisTask.id == task_id).first()
+
+
+def claim_next_task(db):
+    """Atomically move the oldest queued task to running; None when the queue is empty"""
+    while True:
+        task_id = (
+            db.query(AnalysisTask.id)
+            .filter(AnalysisTask.status == "queued")
+            .order_by(AnalysisTask.created_at, AnalysisTask.id)
+            .limit(1)
+            .scalar()
+        )
+        if task_id is None:
+            return None
+        # Only one worker can win the queued -> running transition
+        claimed = (
+            db.query(AnalysisTask)
+            .filter(AnalysisTask.id == task_id, AnalysisTask.status == "queued")
+            .update({"status": "running", "started_at": func.now()}, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            return get_task(db, task_id)
+
+
+def finish_task(db, task_id, result=None, error=None):
+    db.query(AnalysisTask).filter(AnalysisTask.id == task_id).update({
+        "status": "failed" if error else "succeeded",
+        "result": json.dumps(result) if result is not None else None,
+        "error": error,
+        "finished_at": func.now(),
+    }, synchronize_session=False)
+    db.commit()
+
+
+def requeue_running_tasks(db):
+    """Return tasks left running by a previous process to the queue"""
+    count = (
+        db.query(AnalysisTask)
+        .filter(AnalysisTask.status == "running")
+        .update({"status": "queued", "started_at": None}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def upsert_job_postings(db, jobs, source):
+    """Insert new postings and refresh existing ones, deduplicated by normalized URL"""
+    by_url = {}
+    for job in jobs:
+        if job.get("url"):
+            by_url[normalize_url(job["url"])] = job
+    if not by_url:
+        return 0
+
+    existing = {
+        posting.url: posting
+        for posting in db.query(JobPosting).filter(JobPosting.url.in_(list(by_url)))
+    }
+
+    vectors = []
+    for url, job in by_url.items():
+        skills = job["required_skills"]
+        ids = sorted({i for i in (skill_id(s) for s in skills) if i is not None})
+        fields = {
+            "title": job["title"],
+            "company": job["company"],
+            "location": job["location"],
+            "description": job["description"],
+            "source": source,
+            "required_skills": json.dumps(skills),
+            "skill_ids": json.dumps(ids),
+        }
+        posting = existing.get(url)
+        if posting is None:
+            posting = JobPosting(url=url, **fields)
+            db.add(posting)
+        else:
+            for key, value in fields.items():
+                setattr(posting, key, value)
+            posting.last_seen = func.now()
+        vectors.append((posting, embed_job(job).tobytes(), minhash(job_text(job)).tobytes()))
+
+    # New postings need their IDs before their embeddings can reference them
+    db.flush()
+    ids = [p.id for p, _, _ in vectors]
+    db.execute(delete(JobPostingEmbedding).where(JobPostingEmbedding.posting_id.in_(ids)))
+    db.execute(insert(JobPostingEmbedding), [{"posting_id": p.id, "vector": v} for p, v, _ in vectors])
+    db.execute(delete(JobPostingSignature).where(JobPostingSignature.posting_id.in_(ids)))
+    db.execute(insert(JobPostingSignature), [{"posting_id": p.id, "minhash": m} for p, _, m in vectors])
+    db.commit()
+    return len(by_url)
+
+
+def load_job_embeddings(db, posting_ids=None):
+    """
+    (posting ids, raw vector matrix) of every stored posting, or of those in posting_ids;
+    stale or missing vectors are recomputed
+    """
+    ids, rows = [], []
+    query = (
+        db.query(JobPosting, JobPostingEmbedding.vector)
+        .outerjoin(JobPostingEmbedding, JobPostingEmbedding.posting_id == JobPosting.id)
+    )
+    if posting_ids is not None:
+        query = query.filter(JobPosting.id.in_(list(posting_ids)))
+    query = query.yield_per(1000)
+    for posting, data in query:
+        vector = vector_from_bytes(data)
+        if vector is None:
+            vector = embed_job(job_posting_to_dict(posting))
+        ids.append(posting.id)
+        rows.append(vector)
+    matrix = np.stack(rows) if rows else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return ids, matrix
+
+
+def semantic_search_job_postings(db, query_vector, limit=200):
+    """(posting, cosine similarity) pairs nearest to a raw query vector, from the vector index"""
+    index = get_index()
+    if index is None:
+        return []
+    ids, sims = index.search(query_vector, limit)
+    similarity = dict(zip(ids.tolist(), sims.tolist()))
+    return [(p, similarity[p.id]) for p in get_job_postings(db, ids.tolist())]
+
+
+def get_job_postings(db, ids):
+    """Postings by ID, in the order of ids"""
+    postings = {p.id: p for p in db.query(JobPosting).filter(JobPosting.id.in_(list(ids)))}
+    return [postings[i] for i in ids if i in postings]
+
+
+def _fts_phrase(query):
+    return '"' + query.replace('"', '""') + '"'
+
+
+def search_job_postings(db, query, location="", limit=1000):
+    """Full-text search over stored postings, best matches first"""
+    if db.bind.dialect.name == "sqlite":
+        ids = [
+            row[0] for row in db.execute(
+                text(
+                    "SELECT rowid FROM job_postings_fts WHERE job_postings_fts MATCH :query "
+                    "ORDER BY rank LIMIT :limit"
+                ),
+                {"query": _fts_phrase(query), "limit": limit},
+            )
+        ]
+        if not ids:
+            return []
+        postings = {p.id: p for p in db.query(JobPosting).filter(JobPosting.id.in_(ids))}
+        results = [postings[i] for i in ids if i in postings]
+    else:
+        document = func.to_tsvector(
+            "english",
+            func.coalesce(JobPosting.title, "") + " " + func.coalesce(JobPosting.description, "")
+            + " " + func.coalesce(JobPosting.location, ""),
+        )
+        tsquery = func.phraseto_tsquery("english", query)
+        results = (
+            db.query(JobPosting)
+            .filter(document.op("@@")(tsquery))
+            .order_by(func.ts_rank(document, tsquery).desc())
+            .limit(limit)
+            .all()
+        )
+
+    if location and location.lower() != "remote":
+        results = [p for p in results if location.lower() in (p.location or "").lower()]
+    return results
+
+
+def job_postings_to_dicts(db, postings):
+    """job_posting_to_dict of each posting, with its stored MinHash signature for near-duplicate detection"""
+    signatures = dict(
+        db.query(JobPostingSignature.posting_id, JobPostingSignature.minhash)
+        .filter(JobPostingSignature.posting_id.in_([p.id for p in postings]))
+    ) if postings else {}
+    jobs = []
+    for posting in postings:
+        job = job_posting_to_dict(posting)
+        if signatures.get(posting.id):
+            job["minhash"] = signatures[posting.id]
+        jobs.append(job)
+    return jobs
+
+
+def job_posting_to_dict(posting):
+    """Job dict in the format produced by the scrapers"""
+    job = {
+        "title": posting.title,
+        "company": posting.company,
+        "location": posting.location,
+        "description": posting.description,
+        "url": posting.url,
+        "required_skills": json.loads(posting.required_skills or "[]"),
+    }
+    skill_ids = json.loads(posting.skill_ids or "[]")
+    # Precomputed IDs are only usable when every required skill is in the catalog
+    if len(skill_ids) == len(set(s.upper() for s in job["required_skills"])):
+        job["skill_ids"] = skill_ids
+    return job
+
+
+def get_all_job_postings(db):
+    """Every stored posting, oldest first"""
+    return db.query(JobPosting).order_by(JobPosting.id).all()
+
+
+def get_job_posting_signatures(db):
+    """
+    (posting ids, locations, MinHash signature matrix) of every stored posting, oldest first,
+    without loading the postings; missing signatures are computed from the posting
+    """
+    ids, locations, rows, missing = [], [], [], []
+    query = (
+        db.query(JobPosting.id, JobPosting.location, JobPostingSignature.minhash)
+        .outerjoin(JobPostingSignature, JobPostingSignature.posting_id == JobPosting.id)
+        .order_by(JobPosting.id)
+    )
+    for posting_id, location, data in query:
+        signature = signature_from_bytes(data)
+        if signature is None:
+            missing.append(len(rows))
+        ids.append(posting_id)
+        locations.append(location or "")
+        rows.append(signature)
+    for start in range(0, len(missing), 1000):
+        chunk = missing[start:start + 1000]
+        for i, posting in zip(chunk, get_job_postings(db, [ids[i] for i in chunk])):
+            rows[i] = minhash(job_text(job_posting_to_dict(posting)))
+    matrix = np.stack(rows) if rows else np.zeros((0, NUM_PERM), dtype=np.uint32)
+    return ids, locations, matrix
+
+
+def get_latest_job_posting_id(db):
+    return db.query(func.max(JobPosting.id)).scalar() or 0
+
+
+def get_resume_profiles(db):
+    return db.query(ResumeProfile).all()
+
+
+def get_feed_states(db, user_ids=None):
+    """{user_id: UserFeedState} of the given users (default: all) that have a precomputed feed"""
+    query = db.query(UserFeedState)
+    if user_ids is not None:
+        query = query.filter(UserFeedState.user_id.in_(list(user_ids)))
+    return {state.user_id: state for state in query}
+
+
+def get_feed_idf(db):
+    """IDF weights pinned by the last full feed refresh, or None before the first one"""
+    weights = db.query(FeedWeights).filter(FeedWeights.id == 1).first()
+    return vector_from_bytes(weights.idf) if weights is not None else None
+
+
+def save_feed_idf(db, idf):
+    weights = db.query(FeedWeights).filter(FeedWeights.id == 1).first()
+    if weights is None:
+        weights = FeedWeights(id=1)
+        db.add(weights)
+    weights.idf = np.asarray(idf, dtype=np.float32).tobytes()
+    db.commit()
+
+
+def get_stored_matches(db, user_ids):
+    """{user_id: [{posting_id, score, alternate_urls (JSON text)}, ...]} of the users' current feed rows"""
+    matches = {}
+    if not user_ids:
+        return matches
+    columns = (UserJobMatch.user_id, UserJobMatch.posting_id, UserJobMatch.score, UserJobMatch.alternate_urls)
+    rows = db.query(*columns).filter(UserJobMatch.user_id.in_(list(user_ids)))
+    for user_id, posting_id, score, alternate_urls in rows:
+        matches.setdefault(user_id, []).append(
+            {"posting_id": posting_id, "score": score, "alternate_urls": alternate_urls or "[]"}
+        )
+    return matches
+
+
+def _feed_row(user_id, match):
+    return {
+        "user_id": user_id,
+        "posting_id": match["posting_id"],
+        "score": match["score"],
+        "semantic_score": match.get("semantic_score"),
+        "title": match["title"],
+        "company": match["company"],
+        "location": match["location"],
+        "url": match["url"],
+        "alternate_urls": json.dumps(match.get("alternate_urls") or []),
+        "matching_skills": json.dumps(match["matching_skills"]),
+        "missing_skills": json.dumps(match["missing_skills"]),
+    }
+
+
+def save_user_feeds(db, feeds):
+    """
+    Apply refreshed feeds in one transaction and record what they were computed from.
+    Each feed is a dict with user_id, profile_hash and last_posting_id, plus either
+    "matches" (replacing all of the user's rows) or the changes to them: "insert"
+    (matches), "delete" (posting IDs) and "alternate_urls" ({posting_id: URLs}).
+    Returns the number of rows written.
+    """
+    if not feeds:
+        return 0
+    replaced = [feed["user_id"] for feed in feeds if "matches" in feed]
+    if replaced:
+        db.execute(delete(UserJobMatch).where(UserJobMatch.user_id.in_(replaced)))
+    removed = [
+        {"uid": feed["user_id"], "pid": posting_id} for feed in feeds for posting_id in feed.get("delete", ())
+    ]
+    if removed:
+        db.connection().execute(
+            delete(UserJobMatch).where(
+                UserJobMatch.user_id == bindparam("uid"), UserJobMatch.posting_id == bindparam("pid")
+            ),
+            removed,
+        )
+    rows = [
+        _feed_row(feed["user_id"], match)
+        for feed in feeds for match in feed.get("matches", feed.get("insert", ()))
+    ]
+    if rows:
+        db.execute(insert(UserJobMatch), rows)
+    changed = [
+        {"uid": feed["user_id"], "pid": posting_id, "urls": json.dumps(urls)}
+        for feed in feeds for posting_id, urls in feed.get("alternate_urls", {}).items()
+    ]
+    if changed:
+        db.connection().execute(
+            update(UserJobMatch)
+            .where(UserJobMatch.user_id == bindparam("uid"), UserJobMatch.posting_id == bindparam("pid"))
+            .values(alternate_urls=bindparam("urls"))
+            .execution_options(synchronize_session=False),
+            changed,
+        )
+
+    states = get_feed_states(db, [feed["user_id"] for feed in feeds])
+    for feed in feeds:
+        state = states.get(feed["user_id"])
+        if state is None:
+            state = UserFeedState(user_id=feed["user_id"])
+            db.add(state)
+        state.profile_hash = feed["profile_hash"]
+        state.last_posting_id = feed["last_posting_id"]
+    db.commit()
+    return len(rows) + len(removed) + len(changed)
+
+
+def get_user_feed(db, user_id, limit=20, offset=0):
+    """A user's precomputed matches, best first, from the (user_id, score) index"""
+    return (
+        db.query(UserJobMatch)
+        .filter(UserJobMatch.user_id == user_id)
+        .order_by(UserJobMatch.score.desc(), UserJobMatch.posting_id.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+
+def user_job_match_to_dict(match):
+    """Feed row in the format returned by job search, plus posting_id and computed_at"""
+    return {
+        "posting_id": match.posting_id,
+        "title": match.title,
+        "company": match.company,
+        "location": match.location,
+        "url": match.url,
+        "alternate_urls": json.loads(match.alternate_urls or "[]"),
+        "score": match.score,
+        "semantic_score": match.semantic_score,
+        "matching_skills": json.loads(match.matching_skills or "[]"),
+        "missing_skills": json.loads(match.missing_skills or "[]"),
+        "computed_at": match.computed_at,
+    }
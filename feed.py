@@ -0,0 +1,335 @@
+"""
+Precomputed job feeds: every user with a resume profile scored against the job store.
+
+A refresh loads the stored postings once, collapses near-duplicates and scores
+users in shards, on a process pool for large refreshes. Keyword overlap for a
+whole shard is one matrix product, blended with embedding similarity as in
+semantic search. Each user's FEED_TOP_K best matches go to user_job_matches,
+which GET /api/users/{user_id}/feed reads with one index range scan.
+
+Refreshes are incremental: a user whose resume profile is unchanged only has
+postings added since their last refresh scored, together with the stored
+postings those may be near-duplicates of, merged into the stored matches.
+When no profile is new or changed, only those postings are loaded. Embeddings
+are weighted with the IDF pinned by the last full refresh, so merged scores
+match stored ones. Postings refreshed in place, and IDF weights shifting as
+postings arrive, are caught up by a full refresh, at most every
+FEED_FULL_INTERVAL seconds.
+
+Runs after each background ingestion run, or once with: python feed.py [--full]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from database import SessionLocal
+import crud
+from agent_service.dedup import JOB_DEDUP, dedupe_jobs, duplicate_closure, duplicate_pairs
+from agent_service.embeddings import EMBEDDING_DIM, idf_weights, vector_from_bytes, weighted_unit_vectors
+from agent_service.job_matcher import blend_scores, semantic_scores
+from agent_service.metrics import timed
+from agent_service.scoring import JobMatrix, top_k as select_top_k
+from agent_service.skills import skill_names
+
+logger = logging.getLogger(__name__)
+
+JOB_FEED = os.getenv("JOB_FEED", "1") != "0"
+FEED_TOP_K = int(os.getenv("FEED_TOP_K", 50))
+FEED_MIN_SCORE = int(os.getenv("FEED_MIN_SCORE", 40))
+FEED_WORKERS = int(os.getenv("FEED_WORKERS", 1))
+# Smallest (users x postings) scored on a process pool. One process scores ~6M pairs/s,
+# and spawning workers and pickling the corpus to them costs seconds, so a pool only pays
+# off for refreshes that take well over that in this process
+FEED_POOL_MIN_PAIRS = int(os.getenv("FEED_POOL_MIN_PAIRS", 100_000_000))
+FEED_FULL_INTERVAL = float(os.getenv("FEED_FULL_INTERVAL", 24 * 60 * 60))
+# Users per pool task; bounds the (users x postings) score matrix a worker holds
+FEED_SHARD_SIZE = int(os.getenv("FEED_SHARD_SIZE", 64))
+# Most postings an incremental refresh loads by ID; beyond that it loads every posting
+FEED_MAX_LOAD_BY_ID = 10000
+
+# (user_id, skill IDs, unit resume vector or None, last posting ID scored: 0 replaces the stored matches)
+FeedUser = Tuple[int, List[int], Optional[np.ndarray], int]
+
+# Postings as seen by one worker process, set by _init_worker
+_corpus = None
+# time.monotonic() of this process's last full refresh
+_last_full = None
+
+
+def _init_worker(posting_ids: np.ndarray, jobs: List[Dict], vectors: np.ndarray):
+    global _corpus
+    _corpus = (posting_ids, JobMatrix(jobs), vectors)
+
+
+def _score_shard(users: List[FeedUser]) -> List[Tuple[int, int, List[Dict]]]:
+    """(user_id, since, top matches) for each user of a shard, against every posting of the corpus"""
+    posting_ids, matrix, vectors = _corpus
+    keyword = matrix.score_many([skill_ids for _, skill_ids, _, _ in users])
+    # Unit resume vectors as columns; users without an embedding get keyword scores only
+    queries = np.zeros((vectors.shape[1], len(users)), dtype=np.float32)
+    for column, (_, _, embedding, _) in enumerate(users):
+        if embedding is not None:
+            queries[:, column] = embedding
+    similarities = vectors @ queries
+
+    results = []
+    for column, (user_id, skill_ids, embedding, since) in enumerate(users):
+        scores = keyword[column]
+        semantic = None
+        if embedding is not None:
+            semantic = semantic_scores(similarities[:, column])
+            scores = blend_scores(scores, semantic, matrix.skill_counts)
+
+        resume_skills = {s.upper() for s in skill_names(skill_ids)}
+        matches = []
+        for index in select_top_k(scores, FEED_TOP_K, FEED_MIN_SCORE):
+            required = matrix.jobs[index]["required_skills"]
+            matches.append({
+                "posting_id": int(posting_ids[index]),
+                "score": int(scores[index]),
+                "semantic_score": int(round(semantic[index])) if semantic is not None else None,
+                "matching_skills": [s for s in required if s.upper() in resume_skills],
+                "missing_skills": [s for s in required if s.upper() not in resume_skills],
+            })
+        results.append((user_id, since, matches))
+    return results
+
+
+def _pending_users(db, full: bool) -> Tuple[List[Tuple[int, str, int]], int]:
+    """([(user_id, profile hash, since), ...] of feeds to refresh, latest posting ID)"""
+    latest = crud.get_latest_job_posting_id(db)
+    states = crud.get_feed_states(db)
+    pending = []
+    for profile in crud.get_resume_profiles(db):
+        state = states.get(profile.user_id)
+        if full or state is None or state.profile_hash != profile.text_hash:
+            pending.append((profile.user_id, profile.text_hash, 0))
+        elif state.last_posting_id < latest:
+            pending.append((profile.user_id, profile.text_hash, state.last_posting_id))
+    return pending, latest
+
+
+def _affected_postings(db, since: int) -> Tuple[Set[int], int]:
+    """
+    (IDs of the postings added after since and of every stored posting they may be
+    near-duplicates of, number of stored postings). Deduplicating just these postings
+    gives the same canonical postings among them as deduplicating every posting.
+    """
+    ids, locations, signatures = crud.get_job_posting_signatures(db)
+    ids = np.array(ids, dtype=np.int64)
+    affected = ids > since
+    if JOB_DEDUP:
+        affected = duplicate_closure(duplicate_pairs(signatures, locations), affected)
+    return set(ids[affected].tolist()), len(ids)
+
+
+def _load_corpus(db, posting_ids: Optional[List[int]] = None,
+                 idf: Optional[np.ndarray] = None) -> Tuple[List[Dict], np.ndarray]:
+    """
+    (canonical postings in posting_id order, each with posting_id and a unit "vector"; IDF weights)
+    of every stored posting, or of those in posting_ids. Near-duplicates are collapsed into
+    alternate_urls. Without idf, weights are computed over every stored posting.
+    """
+    if posting_ids is None:
+        postings = crud.get_all_job_postings(db)
+    else:
+        postings = crud.get_job_postings(db, posting_ids)
+    jobs = [{**job, "posting_id": p.id} for p, job in zip(postings, crud.job_postings_to_dicts(db, postings))]
+    ids, raw = crud.load_job_embeddings(db, posting_ids)
+    row = {posting_id: i for i, posting_id in enumerate(ids)}
+    # A role's canonical posting (its longest) may be newer than its first
+    canonical = sorted(dedupe_jobs(jobs), key=lambda job: job["posting_id"])
+    if idf is None:
+        # IDF over every stored posting, as in the vector index
+        idf = idf_weights(raw)
+    vectors = weighted_unit_vectors(raw[[row[job["posting_id"]] for job in canonical]], idf)
+    for job, vector in zip(canonical, vectors):
+        job["vector"] = vector
+    return canonical, idf
+
+
+def _with_posting_fields(match: Dict, job: Dict) -> Dict:
+    match.update({key: job[key] for key in ("title", "company", "location", "url")})
+    match["alternate_urls"] = job.get("alternate_urls") or []
+    return match
+
+
+def _feed_changes(stored: List[Dict], fresh: List[Dict], canonical: Dict[int, Dict], affected: Set[int]) -> Dict:
+    """
+    Changes that merge freshly scored postings (the canonical ones among affected)
+    into a user's stored matches: rows that enter the top FEED_TOP_K, rows pushed
+    out or no longer canonical, and kept rows whose posting gained or lost
+    alternate URLs. Stored rows of postings outside affected are unchanged.
+    """
+    stored_ids = {m["posting_id"] for m in stored}
+    kept = [m for m in stored if m["posting_id"] not in affected or m["posting_id"] in canonical]
+    # Same profile and IDF: a rescored posting the user already has keeps its stored score
+    fresh = [m for m in fresh if m["posting_id"] not in stored_ids]
+    # Older postings win ties, as in select_top_k over the whole corpus
+    top = sorted(kept + fresh, key=lambda m: (-m["score"], m["posting_id"]))[:FEED_TOP_K]
+    top_ids = {m["posting_id"] for m in top}
+    alternate_urls = {}
+    for match in kept:
+        if match["posting_id"] not in canonical or match["posting_id"] not in top_ids:
+            continue
+        urls = canonical[match["posting_id"]].get("alternate_urls") or []
+        if match["alternate_urls"] != json.dumps(urls):
+            alternate_urls[match["posting_id"]] = urls
+    added = [m for m in top if m["posting_id"] not in stored_ids]
+    return {
+        "insert": [_with_posting_fields(m, canonical[m["posting_id"]]) for m in added],
+        "delete": sorted(stored_ids - top_ids),
+        "alternate_urls": alternate_urls,
+    }
+
+
+def _displaced(stored: List[Dict], canonical: Dict[int, Dict], affected: Set[int]) -> bool:
+    """
+    Whether a merge would drop one of a full feed's matches (its posting is no longer
+    canonical): the posting that should take its place may be one the user already
+    scored below the top FEED_TOP_K, so only rescoring every posting finds it
+    """
+    return len(stored) >= FEED_TOP_K and any(
+        m["posting_id"] in affected and m["posting_id"] not in canonical for m in stored
+    )
+
+
+def _save(results: List[Tuple[int, int, List[Dict]]], hashes: Dict[int, str], latest: int,
+          canonical: Dict[int, Dict], affected: Set[int]) -> Tuple[int, List[int]]:
+    """(rows written, users left to rescore because a merge would displace one of their matches)"""
+    db = SessionLocal()
+    try:
+        stored = crud.get_stored_matches(db, [user_id for user_id, since, _ in results if since])
+        feeds, displaced = [], []
+        for user_id, since, matches in results:
+            feed = {"user_id": user_id, "profile_hash": hashes[user_id], "last_posting_id": latest}
+            if since and _displaced(stored.get(user_id, []), canonical, affected):
+                displaced.append(user_id)
+                continue
+            if since:
+                feed.update(_feed_changes(stored.get(user_id, []), matches, canonical, affected))
+            else:
+                feed["matches"] = [_with_posting_fields(m, canonical[m["posting_id"]]) for m in matches]
+            feeds.append(feed)
+        return crud.save_user_feeds(db, feeds), displaced
+    finally:
+        db.close()
+
+
+def _score_users(users: List[FeedUser], corpus: List[Dict], hashes: Dict[int, str], latest: int,
+                 affected: Set[int], workers: int) -> Tuple[int, List[int]]:
+    """Score users against corpus and save their feeds; returns what _save does, summed over shards"""
+    global _corpus
+    posting_ids = np.array([job["posting_id"] for job in corpus], dtype=np.int64)
+    jobs = [{key: job[key] for key in ("required_skills", "skill_ids") if key in job} for job in corpus]
+    vectors = np.stack([job["vector"] for job in corpus]) if corpus else np.zeros((0, EMBEDDING_DIM), np.float32)
+    canonical = {job["posting_id"]: job for job in corpus}
+    shards = [users[i:i + FEED_SHARD_SIZE] for i in range(0, len(users), FEED_SHARD_SIZE)]
+
+    written, displaced = 0, []
+    if workers <= 1 or len(shards) == 1 or len(users) * len(corpus) < FEED_POOL_MIN_PAIRS:
+        _init_worker(posting_ids, jobs, vectors)
+        try:
+            saved = [_save(_score_shard(shard), hashes, latest, canonical, affected) for shard in shards]
+        finally:
+            _corpus = None
+    else:
+        # Spawned workers: forking the threaded API process could copy held locks
+        with ProcessPoolExecutor(min(workers, len(shards)), mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(posting_ids, jobs, vectors)) as pool:
+            saved = [_save(results, hashes, latest, canonical, affected)
+                     for results in pool.map(_score_shard, shards)]
+    for rows, users_left in saved:
+        written += rows
+        displaced.extend(users_left)
+    return written, displaced
+
+
+def refresh_feeds(full: Optional[bool] = None, workers: int = FEED_WORKERS) -> int:
+    """
+    Score every user whose feed is out of date; returns the number of users refreshed.
+    full=None rescores everyone on the first call and then every FEED_FULL_INTERVAL seconds.
+    """
+    global _last_full
+    if full is None:
+        full = _last_full is None or time.monotonic() - _last_full >= FEED_FULL_INTERVAL
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        # Incremental refreshes weight embeddings as the last full refresh did
+        idf = None if full else crud.get_feed_idf(db)
+        full = idf is None
+        if full:
+            _last_full = time.monotonic()
+        pending, latest = _pending_users(db, full)
+        if not pending or not latest:
+            return 0
+
+        merged = [since for _, _, since in pending if since]
+        affected, stored = _affected_postings(db, min(merged)) if merged else (set(), 0)
+        # New and changed profiles are scored against every posting
+        corpus = None
+        if len(merged) < len(pending) or len(affected) > min(stored // 2, FEED_MAX_LOAD_BY_ID):
+            corpus, idf = _load_corpus(db, idf=idf)
+            changed = [job for job in corpus if job["posting_id"] in affected]
+        else:
+            changed, idf = _load_corpus(db, sorted(affected), idf)
+        if full:
+            crud.save_feed_idf(db, idf)
+        profiles = {p.user_id: p for p in crud.get_resume_profiles(db)}
+    finally:
+        db.close()
+
+    hashes = {user_id: profile_hash for user_id, profile_hash, _ in pending}
+    users = []
+    for user_id, _, since in pending:
+        embedding = vector_from_bytes(profiles[user_id].embedding)
+        if embedding is not None:
+            embedding = weighted_unit_vectors(embedding, idf)
+        users.append((user_id, json.loads(profiles[user_id].skill_ids), embedding, since))
+    rescored = [user for user in users if not user[3]]
+    merging = [user for user in users if user[3]]
+
+    written = 0
+    with timed("feed_refresh"):
+        if merging:
+            # Postings some merged user has not scored, and the stored postings they may duplicate
+            written, displaced = _score_users(merging, changed, hashes, latest, affected, workers)
+            displaced = set(displaced)
+            rescored += [(user_id, skill_ids, embedding, 0)
+                         for user_id, skill_ids, embedding, _ in merging if user_id in displaced]
+        if rescored:
+            if corpus is None:
+                db = SessionLocal()
+                try:
+                    corpus, _ = _load_corpus(db, idf=idf)
+                finally:
+                    db.close()
+            written += _score_users(rescored, corpus, hashes, latest, affected, workers)[0]
+
+    logger.info(f"Refreshed {len(users)} feeds ({len(users) - len(rescored)} merged against {len(changed)} "
+                f"new or affected postings, {len(rescored)} rescored against all {latest}): "
+                f"{written} rows written in {time.perf_counter() - start:.1f}s")
+    return len(users)
+
+
+if __name__ == "__main__":
+    import models
+    from database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--full", action="store_true", help="rescore every user against every posting")
+    parser.add_argument("--workers", type=int, default=FEED_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    models.Base.metadata.create_all(bind=engine)
+    print(f"Refreshed {refresh_feeds(args.full, args.workers)} feeds")
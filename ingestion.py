@@ -0,0 +1,114 @@
+"""
+Background ingestion of job postings into the local job store.
+
+Configure with JOB_INGEST_QUERIES, a ';'-separated list of "query" or
+"query@location" entries, and JOB_INGEST_INTERVAL (seconds between runs).
+After each run, users' precomputed job feeds are refreshed (see feed.py).
+Run once from the command line with: python ingestion.py "python developer@Remote"
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+
+import httpx
+
+from database import SessionLocal
+import crud
+from feed import JOB_FEED, refresh_feeds
+from agent_service.embeddings import publish_index
+from agent_service.scheduler import get_sources, scrape_jobs
+
+logger = logging.getLogger(__name__)
+
+INGEST_INTERVAL = float(os.getenv("JOB_INGEST_INTERVAL", 30 * 60))
+INGEST_MAX_RESULTS = int(os.getenv("JOB_INGEST_MAX_RESULTS", 100))
+
+
+def parse_queries(spec):
+    """'python developer@Remote;data engineer' -> [(query, location), ...]"""
+    queries = []
+    for entry in spec.split(";"):
+        entry = entry.strip()
+        if not entry:
+            continue
+        query, _, location = entry.partition("@")
+        queries.append((query.strip(), location.strip()))
+    return queries
+
+
+async def _scrape(queries):
+    # This runs on its own event loop, so it gets its own connection pool
+    async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
+        results = []
+        for query, location in queries:
+            for source in get_sources():
+                jobs = await scrape_jobs(query, location, INGEST_MAX_RESULTS, sources=[source], client=client)
+                results.append((query, location, source.name, jobs))
+        return results
+
+
+def ingest(queries):
+    """Scrape each query from every configured source and upsert the results"""
+    stored = 0
+    for query, location, source, jobs in asyncio.run(_scrape(queries)):
+        if not jobs:
+            continue
+        db = SessionLocal()
+        try:
+            stored += crud.upsert_job_postings(db, jobs, source=source)
+        finally:
+            db.close()
+        logger.info(f"Ingested {len(jobs)} {source} postings for query: {query}, location: {location}")
+    if stored:
+        rebuild_vector_index()
+    return stored
+
+
+def rebuild_vector_index():
+    """Rebuild the semantic search index over every stored posting"""
+    db = SessionLocal()
+    try:
+        ids, vectors = crud.load_job_embeddings(db)
+    finally:
+        db.close()
+    index = publish_index(ids, vectors)
+    logger.info(f"Rebuilt vector index over {index.count} postings ({len(index.centroids)} clusters)")
+    return index
+
+
+def _run(queries, stop):
+    while not stop.is_set():
+        try:
+            ingest(queries)
+        except Exception as e:
+            logger.error(f"Job ingestion failed: {str(e)}")
+        # Also picks up changed resume profiles when no postings were stored
+        if JOB_FEED:
+            try:
+                refresh_feeds()
+            except Exception as e:
+                logger.error(f"Feed refresh failed: {str(e)}")
+        stop.wait(INGEST_INTERVAL)
+
+
+def start_background_ingestion(stop):
+    """Start the ingestion loop in a daemon thread if JOB_INGEST_QUERIES is set"""
+    queries = parse_queries(os.getenv("JOB_INGEST_QUERIES", ""))
+    if not queries:
+        return None
+    thread = threading.Thread(target=_run, args=(queries, stop), name="job-ingestion", daemon=True)
+    thread.start()
+    logger.info(f"Started job ingestion for {len(queries)} queries every {INGEST_INTERVAL:.0f}s")
+    return thread
+
+
+if __name__ == "__main__":
+    import models
+    from database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    models.Base.metadata.create_all(bind=engine)
+    print(f"Stored {ingest(parse_queries(';'.join(sys.argv[1:])))} postings")
@@ -1,19 +1,61 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
+import asyncio
+import csv
+import io
+import json
 import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Literal, Optional
 
 from database import SessionLocal, engine
+from pydantic import ValidationError
 import models, schemas, crud
-from agent_service.agent import analyze_resume_and_jd, generate_tailored_answer
-from agent_service.job_matcher import find_matching_jobs
+from agent_service.agent import (
+    analyze_resume_and_jd_async, analyze_resume_batch_async, generate_tailored_answer_async,
+    generate_tailored_answers_async, llm_cache, governor, stream_resume_analysis_async, stream_tailored_answer_async,
+    warm_up
+)
+from agent_service.job_matcher import find_matching_jobs, find_matching_jobs_async, semantic_query
+from agent_service.embeddings import vector_from_bytes
+from agent_service.http_client import close_async_client
+from agent_service.governor import CircuitOpenError
+from agent_service import metrics, scraper
+from ingestion import start_background_ingestion
+from task_queue import TaskQueue, task_to_dict
 
 models.Base.metadata.create_all(bind=engine)
+models.upgrade_schema(engine)
+
+task_queue = TaskQueue()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    stop_ingestion = threading.Event()
+    start_background_ingestion(stop_ingestion)
+    await task_queue.start()
+    # Load the heavy SDKs in the background once the server is accepting requests
+    warming = asyncio.create_task(asyncio.to_thread(warm_up))
+    yield
+    await task_queue.stop()
+    stop_ingestion.set()
+    await close_async_client()
+    # A failed warm-up only means the first request builds the client itself
+    try:
+        await warming
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {str(e)}")
 
-app = FastAPI(title="Job Application Assistant API", version="1.0.0")
+
+app = FastAPI(title="Job Application Assistant API", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -22,20 +64,86 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Trace-Id"],
 )
 
-# Enhanced structured logging
+# Enhanced structured logging; every record carries the trace ID of the request or task that logged it
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
+metrics.install_trace_id_filter()
 logger = logging.getLogger(__name__)
 
+metrics.registry.register_collector("jd_cache", lambda: metrics.cache_samples("jd", scraper.jd_cache.stats()))
+metrics.registry.register_collector("llm_cache", lambda: metrics.cache_samples("llm", llm_cache.stats()))
+metrics.registry.register_collector("mistral", lambda: metrics.governor_samples(governor.snapshot()))
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Assign a trace ID (or adopt the caller's X-Request-ID) and time the request per route"""
+    trace_id = metrics.set_trace_id(request.headers.get("X-Request-ID"))
+    metrics.HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, method=request.method,
+            route=route.path if route is not None else "unmatched", status=status
+        )
+    response.headers["X-Trace-Id"] = trace_id
+    return response
+
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+BATCH_MAX_PAIRS = 50
+ANSWERS_MAX_QUESTIONS = 25
+# Nearest postings fetched from the vector index for a semantic search
+SEMANTIC_CANDIDATES = 200
+# Largest application import body accepted
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 10 * 1024 * 1024))
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def llm_unavailable(e: CircuitOpenError):
+    """503 with Retry-After while the Mistral circuit breaker is open"""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+
+def resolve_resume(db, resume, user_id):
+    """
+    (resume text, skill IDs, embedding) for a request: the request's own resume, with
+    skill IDs and embedding left to be computed, else the user's stored resume profile.
+    A resume sent with a user_id is used for that request only: the stored profile is
+    built from the user's fields alone (see crud.update_user).
+    """
+    if user_id is None and not resume:
+        raise HTTPException(status_code=400, detail="Provide resume or user_id")
+    if user_id is not None and crud.get_user(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if resume:
+        return resume, None, None
+
+    profile = crud.get_resume_profile(db, user_id)
+    if profile is None:
+        profile = crud.upsert_resume_profile(db, user_id, crud.user_resume_text(crud.get_user(db, user_id)))
+    return profile.text, json.loads(profile.skill_ids), vector_from_bytes(profile.embedding)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -54,7 +162,19 @@ def root():
 def health():
     """Health check endpoint"""
     logger.info("Health check requested")
-    return {"status": "ok", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "ok",
+        "timestamp": datetime.now().isoformat(),
+        "jd_cache": scraper.jd_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "mistral": governor.snapshot()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Stage latency histograms, cache counters and Mistral limiter state in Prometheus text format"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/api/users")
@@ -81,6 +201,31 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
     return user
 
 
+@app.put("/api/users/{user_id}")
+def update_user(user_id: int, updates: schemas.UserUpdate, db: Session = Depends(get_db)):
+    """Update user profile; the stored resume profile is rebuilt if the resume fields changed"""
+    logger.info(f"Updating user {user_id}")
+    user = crud.update_user(db, user_id, updates)
+    if not user:
+        logger.warning(f"User not found: {user_id}")
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+@app.get("/api/users/{user_id}/feed")
+def get_user_feed(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """The user's precomputed job matches (see feed.py), best first"""
+    matches = crud.get_user_feed(db, user_id, limit, offset)
+    if not matches and crud.get_user(db, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"jobs": [crud.user_job_match_to_dict(m) for m in matches], "limit": limit, "offset": offset}
+
+
 @app.post("/api/applications")
 def create_application(application: schemas.JobApplicationCreate, db: Session = Depends(get_db)):
     """Create a new job application"""
@@ -95,13 +240,159 @@ def create_application(application: schemas.JobApplicationCreate, db: Session =
 
 
 @app.get("/api/applications/user/{user_id}")
-def get_user_applications(user_id: int, db: Session = Depends(get_db)):
-    """Get all applications for a user (Dashboard)"""
-    logger.info(f"Fetching applications for user: {user_id}")
-    applications = crud.get_user_applications(db, user_id)
+def get_user_applications(
+    user_id: int,
+    response: Response,
+    status: Optional[str] = None,
+    min_score: Optional[int] = None,
+    sort: Literal["applied_date", "score", "status"] = "applied_date",
+    order: Literal["asc", "desc"] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    summary: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Get applications for a user (Dashboard).
+    With `limit`, returns one page and sets the X-Next-Cursor header when more rows exist;
+    `summary` omits notes and jd_url.
+    """
+    logger.info(f"Fetching applications for user: {user_id}, status: {status}, sort: {sort} {order}, limit: {limit}")
+    try:
+        applications, next_cursor = crud.get_user_applications(
+            db, user_id, status=status, min_score=min_score, sort=sort,
+            descending=(order == "desc"), cursor=cursor, limit=limit, summary=summary
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if summary:
+        return [row._asdict() for row in applications]
     return applications
 
 
+APPLICATION_EXPORT_FIELDS = ["id", "company_name", "job_title", "jd_url", "status", "score", "applied_date", "notes"]
+
+
+async def read_import_body(request):
+    """The request body as text; 413 over IMPORT_MAX_BYTES, 400 if it is not UTF-8"""
+    too_large = HTTPException(status_code=413, detail=f"Import body exceeds {IMPORT_MAX_BYTES} bytes")
+    if int(request.headers.get("content-length") or 0) > IMPORT_MAX_BYTES:
+        raise too_large
+    body = bytearray()
+    # Counted as it arrives, so a missing or wrong Content-Length cannot bypass the limit
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > IMPORT_MAX_BYTES:
+            raise too_large
+    try:
+        return body.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Import body is not valid UTF-8: {e}")
+
+
+def parse_application_import(body, fmt):
+    """Validate a CSV or JSONL upload; raises 400 listing the bad lines"""
+    if fmt == "csv":
+        # Empty CSV cells mean "not provided"
+        records = [
+            (line, {k: v for k, v in row.items() if v not in ("", None)})
+            for line, row in enumerate(csv.DictReader(io.StringIO(body)), start=2)
+        ]
+    else:
+        records = []
+        for line, text in enumerate(body.splitlines(), start=1):
+            if text.strip():
+                try:
+                    records.append((line, json.loads(text)))
+                except ValueError as e:
+                    records.append((line, e))
+
+    applications, errors = [], []
+    for line, record in records:
+        if isinstance(record, Exception):
+            errors.append(f"line {line}: {record}")
+            continue
+        try:
+            applications.append(schemas.JobApplicationImport(**record))
+        except (ValidationError, TypeError) as e:
+            errors.append(f"line {line}: {e}")
+    if errors:
+        raise HTTPException(status_code=400, detail=errors[:20])
+    return applications
+
+
+@app.post("/api/applications/import")
+async def import_applications(
+    request: Request,
+    user_id: int,
+    format: Literal["csv", "jsonl"] = "csv",
+    db: Session = Depends(get_db)
+):
+    """Import applications from a CSV or JSONL request body in one transaction"""
+    body = await read_import_body(request)
+    applications = parse_application_import(body, format)
+    logger.info(f"Importing {len(applications)} applications for user {user_id} from {format}")
+    try:
+        created = await asyncio.to_thread(crud.bulk_create_job_applications, db, user_id, applications)
+    except Exception as e:
+        logger.error(f"Error importing applications: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    logger.info(f"Imported {created} applications")
+    return {"imported": created}
+
+
+@app.get("/api/applications/user/{user_id}/export")
+def export_applications(user_id: int, format: Literal["csv", "jsonl"] = "csv"):
+    """Stream all of a user's applications as CSV or JSONL"""
+    logger.info(f"Exporting applications for user {user_id} as {format}")
+
+    def rows():
+        # The response outlives request dependencies, so the stream owns its session
+        db = SessionLocal()
+        try:
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=APPLICATION_EXPORT_FIELDS)
+                writer.writeheader()
+            for app_row in crud.iter_user_applications(db, user_id):
+                record = {field: getattr(app_row, field) for field in APPLICATION_EXPORT_FIELDS}
+                if record["applied_date"] is not None:
+                    record["applied_date"] = record["applied_date"].isoformat()
+                if format == "csv":
+                    writer.writerow(record)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    yield json.dumps(record) + "\n"
+            if format == "csv" and buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            db.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"applications_user_{user_id}.{format}"
+    return StreamingResponse(
+        rows(), media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.patch("/api/applications/bulk")
+def bulk_update_applications(updates: schemas.JobApplicationBulkUpdate, db: Session = Depends(get_db)):
+    """Set status/score/notes on many applications with a single UPDATE"""
+    logger.info(f"Bulk updating {len(updates.ids)} applications with status: {updates.status}")
+    try:
+        updated = crud.bulk_update_job_applications(db, updates)
+    except Exception as e:
+        logger.error(f"Error bulk updating applications: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"updated": updated}
+
+
 @app.put("/api/applications/{app_id}")
 def update_application(app_id: int, updates: schemas.JobApplicationUpdate, db: Session = Depends(get_db)):
     """Update application status"""
@@ -114,42 +405,202 @@ def update_application(app_id: int, updates: schemas.JobApplicationUpdate, db: S
 
 
 @app.post("/api/resume/analyze")
-def resume_analyze(req: schemas.ResumeRequest):
+async def resume_analyze(req: schemas.ResumeRequest, db: Session = Depends(get_db)):
     """Analyze resume against job description"""
     logger.info(f"Analyzing resume for JD: {req.jd_url}")
+    resume, _, _ = await asyncio.to_thread(resolve_resume, db, req.resume, req.user_id)
     try:
-        result = analyze_resume_and_jd(req.resume, req.jd_url)
+        result = await analyze_resume_and_jd_async(resume, req.jd_url)
         logger.info(f"Resume analysis completed with score: {result.score}")
         return result.dict()
+    except CircuitOpenError as e:
+        logger.warning(f"Rejected resume analysis: {str(e)}")
+        raise llm_unavailable(e)
     except Exception as e:
         logger.error(f"Error analyzing resume: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/generate/answer")
-def generate_answer(req: schemas.AnswerRequest):
+async def generate_answer(req: schemas.AnswerRequest):
     """Generate tailored answer for application question"""
     logger.info(f"Generating answer for question: {req.question[:50]}...")
     try:
-        answer = generate_tailored_answer(req.profile, req.jd_url, req.question)
+        answer = await generate_tailored_answer_async(req.profile, req.jd_url, req.question)
         logger.info("Answer generated successfully")
         return {"answer": answer}
+    except CircuitOpenError as e:
+        logger.warning(f"Rejected answer generation: {str(e)}")
+        raise llm_unavailable(e)
     except Exception as e:
         logger.error(f"Error generating answer: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/generate/answers")
+async def generate_answers(req: schemas.MultiAnswerRequest):
+    """Generate tailored answers to several application questions for one job, keyed by question"""
+    logger.info(f"Generating answers to {len(req.questions)} questions for JD: {req.jd_url}")
+    questions = [question for question in req.questions if question.strip()]
+    if not questions:
+        raise HTTPException(status_code=400, detail="questions must not be empty")
+    if len(questions) > ANSWERS_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {ANSWERS_MAX_QUESTIONS} questions per request")
+    try:
+        answers = await generate_tailored_answers_async(req.profile, req.jd_url, questions)
+        logger.info(f"Generated {len(answers)} answers")
+        return {"answers": answers}
+    except CircuitOpenError as e:
+        logger.warning(f"Rejected answer generation: {str(e)}")
+        raise llm_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error generating answers: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/resume/analyze/batch")
+async def resume_analyze_batch(req: schemas.BatchResumeRequest, db: Session = Depends(get_db)):
+    """Analyze resumes against several job descriptions in one request"""
+    logger.info(f"Batch analysis of {len(req.resumes)} resumes against {len(req.jd_urls)} JDs")
+    if not req.resumes or not req.jd_urls:
+        raise HTTPException(status_code=400, detail="resumes and jd_urls must not be empty")
+    if len(req.resumes) * len(req.jd_urls) > BATCH_MAX_PAIRS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_PAIRS} resume/JD pairs per batch")
+    if req.user_id is not None and len(req.resumes) != 1:
+        raise HTTPException(status_code=400, detail="user_id can only be used with a single resume")
+
+    try:
+        entries = await analyze_resume_batch_async(req.resumes, req.jd_urls)
+    except CircuitOpenError as e:
+        logger.warning(f"Rejected batch analysis: {str(e)}")
+        raise llm_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error in batch analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = [
+        {**entry, "result": entry["result"].dict() if entry["result"] else None}
+        for entry in entries
+    ]
+    failed = sum(1 for entry in results if entry["error"])
+    logger.info(f"Batch analysis completed: {len(results) - failed} succeeded, {failed} failed")
+
+    updated = 0
+    if req.user_id is not None:
+        scores = {entry["jd_url"]: entry["result"]["score"] for entry in results if entry["result"]}
+        updated = await asyncio.to_thread(crud.update_application_scores, db, req.user_id, scores)
+        logger.info(f"Updated scores on {updated} applications for user {req.user_id}")
+
+    return {"results": results, "failed": failed, "applications_updated": updated}
+
+
+@app.post("/api/resume/analyze/stream")
+async def resume_analyze_stream(req: schemas.ResumeRequest, db: Session = Depends(get_db)):
+    """Analyze resume against job description, streamed as Server-Sent Events"""
+    logger.info(f"Streaming resume analysis for JD: {req.jd_url}")
+    resume, _, _ = await asyncio.to_thread(resolve_resume, db, req.resume, req.user_id)
+
+    async def events():
+        try:
+            async for kind, value in stream_resume_analysis_async(resume, req.jd_url):
+                if kind == "score":
+                    yield sse_event("score", {"score": value})
+                else:
+                    logger.info(f"Resume analysis completed with score: {value.score}")
+                    yield sse_event("result", value.dict())
+        except CircuitOpenError as e:
+            logger.warning(f"Rejected resume analysis: {str(e)}")
+            yield sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            logger.error(f"Error analyzing resume: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/api/generate/answer/stream")
+async def generate_answer_stream(req: schemas.AnswerRequest):
+    """Generate tailored answer, streamed token by token as Server-Sent Events"""
+    logger.info(f"Streaming answer for question: {req.question[:50]}...")
+
+    async def events():
+        try:
+            async for delta in stream_tailored_answer_async(req.profile, req.jd_url, req.question):
+                yield sse_event("token", {"text": delta})
+            logger.info("Answer generated successfully")
+            yield sse_event("done", {})
+        except CircuitOpenError as e:
+            logger.warning(f"Rejected answer generation: {str(e)}")
+            yield sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            logger.error(f"Error generating answer: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/api/tasks/resume/analyze")
+async def submit_resume_analyze(req: schemas.ResumeRequest, db: Session = Depends(get_db)):
+    """Queue a resume analysis; poll /api/tasks/{task_id} for the result"""
+    resume, _, _ = await asyncio.to_thread(resolve_resume, db, req.resume, req.user_id)
+    task = await task_queue.submit("resume_analyze", {"resume": resume, "jd_url": req.jd_url})
+    logger.info(f"Queued resume analysis task {task.id} for JD: {req.jd_url}")
+    return {"task_id": task.id, "status": task.status}
+
+
+@app.post("/api/tasks/generate/answer")
+async def submit_generate_answer(req: schemas.AnswerRequest):
+    """Queue tailored answer generation; poll /api/tasks/{task_id} for the result"""
+    task = await task_queue.submit("generate_answer", req.dict())
+    logger.info(f"Queued answer task {task.id} for question: {req.question[:50]}...")
+    return {"task_id": task.id, "status": task.status}
+
+
+@app.get("/api/tasks/{task_id}")
+async def get_task(task_id: str, wait: float = Query(0, ge=0, le=60)):
+    """Task status and result; with wait, long-polls up to that many seconds for completion"""
+    task = await task_queue.wait(task_id, wait)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task_to_dict(task)
+
+
 @app.post("/api/jobs/search")
-def search_jobs(req: schemas.JobSearchRequest):
+async def search_jobs(req: schemas.JobSearchRequest, db: Session = Depends(get_db)):
     """Search for jobs matching the resume"""
     logger.info(f"Searching jobs for query: {req.job_query}, location: {req.location}, min score: {req.min_match_score}")
+    resume, resume_skill_ids, resume_vector = await asyncio.to_thread(resolve_resume, db, req.resume, req.user_id)
     try:
-        jobs = find_matching_jobs(
-            resume_text=req.resume,
+        query_vector = None
+        corpus = []
+        if req.mode == "semantic":
+            query_vector = await asyncio.to_thread(semantic_query, resume, req.job_query, resume_vector)
+            hits = await asyncio.to_thread(crud.semantic_search_job_postings, db, query_vector, SEMANTIC_CANDIDATES)
+            jobs = await asyncio.to_thread(crud.job_postings_to_dicts, db, [p for p, _ in hits])
+            corpus = [{**job, "similarity": similarity} for job, (_, similarity) in zip(jobs, hits)]
+            logger.info(f"Vector index returned {len(corpus)} postings")
+        if not corpus:
+            # Prefer the local job store; an empty result falls back to live scraping
+            postings = await asyncio.to_thread(crud.search_job_postings, db, req.job_query, req.location)
+            corpus = await asyncio.to_thread(crud.job_postings_to_dicts, db, postings)
+            logger.info(f"Job store returned {len(corpus)} postings")
+
+        options = dict(
+            resume_text=resume,
             job_query=req.job_query,
             location=req.location,
-            min_score=req.min_match_score
+            min_score=req.min_match_score,
+            corpus=corpus,
+            max_results=req.max_results,
+            resume_skill_ids=resume_skill_ids,
+            mode=req.mode,
+            query_vector=query_vector
         )
+        if corpus:
+            # Deduplicating and scoring up to a thousand stored postings is CPU-bound
+            jobs = await asyncio.to_thread(find_matching_jobs, **options)
+        else:
+            jobs = await find_matching_jobs_async(**options)
         logger.info(f"Found {len(jobs)} matching jobs")
         return {"jobs": jobs, "total": len(jobs)}
     except Exception as e:
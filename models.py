@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import (
+    Column, Integer, String, Text, DateTime, DDL, ForeignKey, Index, LargeBinary, event, inspect, text
+)
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from database import Base
 
+# SQLite's CURRENT_TIMESTAMP format. Binding datetimes in the same format keeps
+# comparisons against server-default timestamps correct (dashboard keyset cursors).
+SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -16,15 +25,185 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class ResumeProfile(Base):
+    """Preprocessed form of a user's resume, rebuilt only when the resume text changes"""
+    __tablename__ = "resume_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True)
+    text = Column(Text)  # whitespace-normalized resume text
+    text_hash = Column(String(64))  # sha256 of text
+    skill_ids = Column(Text)  # JSON list of catalog skill IDs
+    embedding = Column(LargeBinary, nullable=True)  # float32 vector, when embeddings are enabled
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class JobApplication(Base):
     __tablename__ = "job_applications"
+    __table_args__ = (
+        # Dashboard keyset pagination: filter by user, order by the sort column then id
+        Index("ix_job_applications_user_applied", "user_id", "applied_date", "id"),
+        Index("ix_job_applications_user_status", "user_id", "status", "id"),
+        Index("ix_job_applications_user_score", "user_id", "score", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer)
+    user_id = Column(Integer, ForeignKey("users.id"))
     company_name = Column(String(255))
     job_title = Column(String(255))
     jd_url = Column(Text)
     status = Column(String(100), default="Not Submitted")
     score = Column(Integer, nullable=True)
-    applied_date = Column(DateTime(timezone=True), server_default=func.now())
+    applied_date = Column(DateTime(timezone=True).with_variant(SQLITE_TIMESTAMP, "sqlite"), server_default=func.now())
     notes = Column(Text, nullable=True)
+
+
+class AnalysisTask(Base):
+    __tablename__ = "analysis_tasks"
+    __table_args__ = (
+        Index("ix_analysis_tasks_status_created", "status", "created_at"),
+    )
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(50))
+    status = Column(String(20), default="queued")  # queued, running, succeeded, failed
+    payload = Column(Text)  # JSON request
+    result = Column(Text, nullable=True)  # JSON response
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class JobPosting(Base):
+    __tablename__ = "job_postings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(2048), unique=True, index=True)
+    title = Column(String(255))
+    company = Column(String(255))
+    location = Column(String(255))
+    description = Column(Text)
+    source = Column(String(50))
+    required_skills = Column(Text)  # JSON list of skill names
+    skill_ids = Column(Text)  # JSON list of catalog skill IDs
+    first_seen = Column(DateTime(timezone=True), server_default=func.now())
+    last_seen = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class JobPostingEmbedding(Base):
+    """Hashed TF vector of a posting, computed at ingestion and indexed by agent_service.embeddings"""
+    __tablename__ = "job_posting_embeddings"
+
+    posting_id = Column(Integer, ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True)
+    vector = Column(LargeBinary)  # float32 x EMBEDDING_DIM
+
+
+class JobPostingSignature(Base):
+    """MinHash signature of a posting, computed at ingestion for agent_service.dedup"""
+    __tablename__ = "job_posting_signatures"
+
+    posting_id = Column(Integer, ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True)
+    minhash = Column(LargeBinary)  # uint32 x NUM_PERM
+
+
+class UserJobMatch(Base):
+    """One of a user's precomputed top matches in the job store, written by feed.py"""
+    __tablename__ = "user_job_matches"
+    __table_args__ = (
+        # The feed: one user's matches, best first
+        Index("ix_user_job_matches_user_score", "user_id", "score", "posting_id"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    posting_id = Column(Integer, ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Integer)
+    semantic_score = Column(Integer, nullable=True)
+    # Copied from the posting so the feed is read from this table alone
+    title = Column(String(255))
+    company = Column(String(255))
+    location = Column(String(255))
+    url = Column(String(2048))
+    alternate_urls = Column(Text)  # JSON list
+    matching_skills = Column(Text)  # JSON list of skill names
+    missing_skills = Column(Text)  # JSON list of skill names
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class UserFeedState(Base):
+    """What a user's stored matches were computed from, so refreshes can be incremental"""
+    __tablename__ = "user_feed_states"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    profile_hash = Column(String(64))  # ResumeProfile.text_hash at the last full scoring
+    last_posting_id = Column(Integer)  # postings up to this ID have been scored
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class FeedWeights(Base):
+    """IDF weights pinned by the last full feed refresh, which incremental refreshes score with"""
+    __tablename__ = "feed_weights"
+
+    id = Column(Integer, primary_key=True)  # a single row, id 1
+    idf = Column(LargeBinary)  # float32 x EMBEDDING_DIM
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# Full-text index over title/description/location.
+# SQLite: external-content FTS5 table kept in sync by triggers.
+# Postgres: GIN index on the tsvector expression used by crud.search_job_postings.
+for _statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS job_postings_fts USING fts5("
+    "title, description, location, content='job_postings', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS job_postings_ai AFTER INSERT ON job_postings BEGIN "
+    "INSERT INTO job_postings_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+    "CREATE TRIGGER IF NOT EXISTS job_postings_ad AFTER DELETE ON job_postings BEGIN "
+    "INSERT INTO job_postings_fts(job_postings_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); END",
+    "CREATE TRIGGER IF NOT EXISTS job_postings_au AFTER UPDATE ON job_postings BEGIN "
+    "INSERT INTO job_postings_fts(job_postings_fts, rowid, title, description, location) "
+    "VALUES ('delete', old.id, old.title, old.description, old.location); "
+    "INSERT INTO job_postings_fts(rowid, title, description, location) "
+    "VALUES (new.id, new.title, new.description, new.location); END",
+):
+    event.listen(JobPosting.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    JobPosting.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_job_postings_search ON job_postings USING gin ("
+        "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '') "
+        "|| ' ' || coalesce(location, '')))"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+def upgrade_schema(engine):
+    """
+    Bring a job_applications table created by an older version up to date: create_all
+    skips tables that already exist, so its dashboard indexes (and, on Postgres, the
+    user_id foreign key) are added here. An index whose columns changed is rebuilt.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(JobApplication.__tablename__):
+        return
+    existing = {index["name"]: index["column_names"] for index in inspector.get_indexes(JobApplication.__tablename__)}
+    with engine.begin() as connection:
+        for index in JobApplication.__table__.indexes:
+            if existing.get(index.name) == [column.name for column in index.columns]:
+                continue
+            if index.name in existing:
+                index.drop(bind=connection)
+            index.create(bind=connection)
+
+        # SQLite cannot add a constraint to an existing table (nor enforces one without PRAGMA foreign_keys)
+        if connection.dialect.name != "sqlite" and not any(
+            key["referred_table"] == "users" for key in inspector.get_foreign_keys(JobApplication.__tablename__)
+        ):
+            # NOT VALID: rows written before the constraint existed are not checked
+            connection.execute(text(
+                "ALTER TABLE job_applications ADD CONSTRAINT job_applications_user_id_fkey "
+                "FOREIGN KEY (user_id) REFERENCES users (id) NOT VALID"
+            ))
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Literal, Optional
 
 
 class UserCreate(BaseModel):
@@ -11,9 +12,28 @@ class UserCreate(BaseModel):
     work_history: str
 
 
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    skills: Optional[str] = None
+    education: Optional[str] = None
+    work_history: Optional[str] = None
+
+
 class ResumeRequest(BaseModel):
-    resume: str
+    # Either the resume text, or user_id to reuse that user's stored resume profile
+    resume: Optional[str] = None
     jd_url: str
+    user_id: Optional[int] = None
+
+
+class BatchResumeRequest(BaseModel):
+    # One resume against many JDs, many resumes against one JD, or every pair of both
+    resumes: List[str]
+    jd_urls: List[str]
+    # Write each score into the user's applications with a matching jd_url (single resume only)
+    user_id: Optional[int] = None
 
 
 class AnswerRequest(BaseModel):
@@ -22,6 +42,12 @@ class AnswerRequest(BaseModel):
     question: str
 
 
+class MultiAnswerRequest(BaseModel):
+    profile: str
+    jd_url: str
+    questions: List[str]
+
+
 class JobApplicationCreate(BaseModel):
     user_id: int
     company_name: str
@@ -37,8 +63,28 @@ class JobApplicationUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class JobApplicationImport(BaseModel):
+    company_name: str
+    job_title: str
+    jd_url: str
+    status: Optional[str] = "Not Submitted"
+    score: Optional[int] = None
+    notes: Optional[str] = None
+    applied_date: Optional[datetime] = None
+
+
+class JobApplicationBulkUpdate(JobApplicationUpdate):
+    ids: List[int]
+
+
 class JobSearchRequest(BaseModel):
-    resume: str
+    # Either the resume text, or user_id to reuse that user's stored resume profile
+    resume: Optional[str] = None
+    user_id: Optional[int] = None
     job_query: str
     location: Optional[str] = ""
     min_match_score: Optional[int] = 60
+    # Capped because every page_size results is one more page fetched per source
+    max_results: int = Field(15, ge=1, le=100)
+    # "semantic" ranks by embedding similarity blended with keyword overlap
+    mode: Literal["keyword", "semantic"] = "keyword"
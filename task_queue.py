@@ -0,0 +1,148 @@
+"""
+Background queue for LLM analysis tasks.
+
+Tasks are persisted in the analysis_tasks table, so queued work survives a
+restart, and are run by a fixed pool of asyncio workers inside the API
+process. TASK_WORKERS caps how many Mistral calls the queue makes at once.
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from database import SessionLocal
+import crud
+from agent_service.agent import analyze_resume_and_jd_async, generate_tailored_answer_async
+from agent_service.metrics import set_trace_id
+
+logger = logging.getLogger(__name__)
+
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", 4))
+TASK_POLL_INTERVAL = float(os.getenv("TASK_POLL_INTERVAL", 2.0))
+
+
+async def _resume_analyze(payload):
+    result = await analyze_resume_and_jd_async(payload["resume"], payload["jd_url"])
+    return result.dict()
+
+
+async def _generate_answer(payload):
+    answer = await generate_tailored_answer_async(payload["profile"], payload["jd_url"], payload["question"])
+    return {"answer": answer}
+
+
+TASK_HANDLERS = {
+    "resume_analyze": _resume_analyze,
+    "generate_answer": _generate_answer,
+}
+
+
+def _with_session(fn, *args, **kwargs):
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def task_to_dict(task):
+    return {
+        "task_id": task.id,
+        "kind": task.kind,
+        "status": task.status,
+        "result": json.loads(task.result) if task.result else None,
+        "error": task.error,
+        "created_at": task.created_at,
+        "finished_at": task.finished_at,
+    }
+
+
+class TaskQueue:
+    """In-process worker pool over the persisted task table, with in-memory wakeups for long-polls"""
+
+    def __init__(self, workers=TASK_WORKERS):
+        self.workers = workers
+        self._wakeup = asyncio.Event()
+        # task ID -> [event set when the task finishes, number of waiters]
+        self._finished = {}
+        self._tasks = []
+
+    async def start(self):
+        if self.workers <= 0:
+            return
+        requeued = await asyncio.to_thread(_with_session, crud.requeue_running_tasks)
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted tasks")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} task workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind, payload):
+        task = await asyncio.to_thread(_with_session, crud.create_task, kind, payload)
+        self._wakeup.set()
+        return task
+
+    async def wait(self, task_id, timeout):
+        """Return the task once it has finished, or its current state after timeout seconds"""
+        task = await asyncio.to_thread(_with_session, crud.get_task, task_id)
+        if task is None or task.status in ("succeeded", "failed") or timeout <= 0:
+            return task
+
+        waiting = self._finished.setdefault(task_id, [asyncio.Event(), 0])
+        waiting[1] += 1
+        event = waiting[0]
+        try:
+            # Re-read periodically too, in case another process ran the task
+            deadline = asyncio.get_running_loop().time() + timeout
+            while True:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, TASK_POLL_INTERVAL))
+                    break
+                except asyncio.TimeoutError:
+                    task = await asyncio.to_thread(_with_session, crud.get_task, task_id)
+                    if task.status in ("succeeded", "failed"):
+                        return task
+        finally:
+            # The last waiter to give up drops the event; the worker drops it when the task finishes
+            waiting[1] -= 1
+            if waiting[1] == 0 and self._finished.get(task_id) is waiting:
+                del self._finished[task_id]
+        return await asyncio.to_thread(_with_session, crud.get_task, task_id)
+
+    async def _worker(self, number):
+        while True:
+            self._wakeup.clear()
+            task = await asyncio.to_thread(_with_session, crud.claim_next_task)
+            if task is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), TASK_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Logs from the task's pipeline carry its ID as their trace ID
+            set_trace_id(task.id)
+            logger.info(f"Worker {number} running task {task.id} ({task.kind})")
+            result, error = None, None
+            try:
+                result = await TASK_HANDLERS[task.kind](json.loads(task.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task {task.id} failed: {str(e)}")
+                error = str(e)
+
+            await asyncio.to_thread(_with_session, crud.finish_task, task.id, result, error)
+            waiting = self._finished.pop(task.id, None)
+            if waiting is not None:
+                waiting[0].set()
+            set_trace_id("-")